@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -24,6 +25,9 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "changeme")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = bool(int(os.environ.get("DEBUG", 0)))
 
+# Running under ``manage.py test``
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = []
 ALLOWED_HOSTS.extend(
     filter(
@@ -41,14 +45,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'recipe',
+    'user',
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular'
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +63,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaReadMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -81,16 +89,51 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# DB_CONN_MAX_AGE keeps connections open between requests (seconds, 0
+# closes them after each request). DB_POOL=1 instead borrows connections
+# from a bounded per-process pool and returns them after each request.
+DB_POOL = os.environ.get('DB_POOL', '0') == '1'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'core.db.postgresql_pool' if DB_POOL
+            else 'django.db.backends.postgresql'
+        ),
         'HOST': os.environ.get("DB_HOST"),
         'NAME': os.environ.get("DB_NAME"),
         'USER': os.environ.get("DB_USER"),
         'PASSWORD': os.environ.get("DB_PASSWORD"),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': os.environ.get(
+            'DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+        },
     }
 }
 
+# Read replicas: comma separated hosts sharing the primary's credentials.
+# Safe recipe api requests read from them; tests mirror the primary. The
+# writer pin needs a shared cache, the core.E001 check refuses LocMemCache.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# Seconds a user reads from the primary after their data changes; keep it
+# above the replication lag so lagging reads never reach the response cache
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -144,3 +187,103 @@ REST_FRAMEWORK = {
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True
 }
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Backends holding entries inside one process. Every uWSGI or uvicorn
+# worker would keep its own copy and miss the invalidations of the others.
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+SHARED_CACHE = CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+RECIPE_CACHE_ALIAS = 'default'
+# Responses are cached only in a shared backend, or under the test runner
+RECIPE_CACHE_TIMEOUT = int(os.environ.get(
+    'RECIPE_CACHE_TIMEOUT', 300 if SHARED_CACHE or TESTING else 0))
+
+# Text search configuration used for recipe search vectors
+RECIPE_SEARCH_CONFIG = os.environ.get('RECIPE_SEARCH_CONFIG', 'english')
+
+# Recipe image processing
+# Executor for image renditions: "thread", "process" or "sync" (inline)
+IMAGE_PIPELINE_EXECUTOR = os.environ.get('IMAGE_PIPELINE_EXECUTOR', 'thread')
+IMAGE_PIPELINE_WORKERS = int(os.environ.get('IMAGE_PIPELINE_WORKERS', 2))
+IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', 85))
+
+# Uploads beyond these limits are rejected while they stream in
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40_000_000))
+RECIPE_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+# Token authentication lookup cache, holding token to user id only.
+# Alias of a cache shared between processes; revocations apply at once.
+AUTH_TOKEN_SHARED_CACHE = os.environ.get('AUTH_TOKEN_SHARED_CACHE', '')
+# Per-process fallback, off by default: other processes accept revoked
+# tokens and deactivated users for up to the TTL.
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 4096))
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 0))
+AUTH_TOKEN_SHARED_TTL = int(os.environ.get('AUTH_TOKEN_SHARED_TTL', 300))
+
+# Password hashing
+# The PBKDF2 work factor can change; stored hashes upgrade on next login.
+PASSWORD_HASHERS = [
+    'user.hashing.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', 600000))
+# Request threads per uWSGI worker, also passed to uwsgi by run.sh
+UWSGI_THREADS = int(os.environ.get('UWSGI_THREADS', 4))
+# Hashing pool per process; logins beyond workers + queue get a 503.
+# The default leaves half of the request threads free for other calls.
+PASSWORD_HASH_WORKERS = int(os.environ.get(
+    'PASSWORD_HASH_WORKERS', max(1, UWSGI_THREADS // 2)))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 0))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+# Server mode: "wsgi" (uWSGI) or "asgi" (uvicorn). Under ASGI the recipe
+# and tag reads run as async views.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+RECIPE_ASYNC_READS = SERVER_MODE == 'asgi'
+
+# Request instrumentation: share of requests timed and logged as JSON,
+# off under the test runner. bench_instrumentation measures the cost.
+PERF_SAMPLE_RATE = float(os.environ.get(
+    'PERF_SAMPLE_RATE', 0 if TESTING else 0.05))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('PERF_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# OpenAPI schema built at deploy time by ``manage.py build_schema``
+SCHEMA_CACHE_PATH = os.environ.get('SCHEMA_CACHE_PATH',
+                                   '/vol/web/schema/openapi.json')
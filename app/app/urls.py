@@ -16,21 +16,21 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularSwaggerView
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core.schema import CachedSchemaView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schema', SpectacularAPIView.as_view(), name='api-schema'),
+    path('api/schema', CachedSchemaView.as_view(), name='api-schema'),
     path('api/docs',
          SpectacularSwaggerView.as_view(url_name='api-schema'),
          name='api-docs'),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),
+    path('api/internal/', include('core.urls')),
 ]
 if settings.DEBUG:
     urlpatterns += static(
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+
+        from core.checks import check_replica_pin_cache
+        from core.instrumentation import install_query_wrapper
+        checks.register(check_replica_pin_cache, checks.Tags.caches)
+        connection_created.connect(install_query_wrapper)
@@ -0,0 +1,227 @@
+"""
+Helpers shared by the benchmark management commands
+"""
+import io
+import statistics
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+WORDS = (
+    'beef', 'chicken', 'tofu', 'lentil', 'salmon', 'mushroom', 'pumpkin',
+    'lasagna', 'curry', 'soup', 'salad', 'stew', 'risotto', 'tacos',
+    'noodles', 'pie', 'roast', 'burger', 'pancakes', 'chili',
+)
+
+
+@contextmanager
+def scratch_data():
+    """Run the block in a transaction that is always rolled back"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def create_bench_user(email='bench@example.com'):
+    """Create a user to own the benchmark data"""
+    return get_user_model().objects.create_user(email=email)
+
+
+def seed_recipes(user, count, batch_size=1000):
+    """Bulk insert ``count`` recipes for ``user``"""
+    recipes = (
+        Recipe(
+            user=user,
+            title=f'{WORDS[i % len(WORDS)]} {WORDS[i * 7 % len(WORDS)]}',
+            description=f'Recipe {i} with {WORDS[i * 3 % len(WORDS)]}',
+            time_minutes=i % 120 + 1,
+            price=Decimal('5.00'),
+        )
+        for i in range(count)
+    )
+    while True:
+        batch = list(islice(recipes, batch_size))
+        if not batch:
+            break
+        Recipe.objects.bulk_create(batch, batch_size=batch_size)
+
+
+def seed_tags(user, count):
+    """Bulk insert ``count`` tags for ``user`` and return them"""
+    return Tag.objects.bulk_create(
+        [Tag(user=user, name=f'Tag {i}') for i in range(count)]
+    )
+
+
+def tag_recipes(user, tags, per_recipe, batch_size=5000):
+    """Link every recipe of ``user`` to ``per_recipe`` of ``tags``"""
+    through = Recipe.tags.through
+    recipe_ids = Recipe.objects.filter(user=user)\
+        .values_list('id', flat=True).iterator()
+    links = (
+        through(recipe_id=recipe_id,
+                tag_id=tags[(index + offset) % len(tags)].id)
+        for index, recipe_id in enumerate(recipe_ids)
+        for offset in range(per_recipe)
+    )
+    while True:
+        batch = list(islice(links, batch_size))
+        if not batch:
+            break
+        through.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def batched(rows, size):
+    """Yield lists of at most ``size`` items from the ``rows`` iterable"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _copy_value(value):
+    """Encode one value for the text format of ``COPY``"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t')\
+        .replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_rows(model, fields, rows, batch_size=10000):
+    """
+    Load ``rows`` of ``fields`` values into the table of ``model``.
+
+    Uses ``COPY FROM STDIN`` on PostgreSQL and ``bulk_create`` elsewhere,
+    buffering at most ``batch_size`` rows at a time. Returns the number
+    of rows loaded.
+    """
+    quote = connection.ops.quote_name
+    columns = [quote(model._meta.get_field(name).column) for name in fields]
+    loaded = 0
+    for batch in batched(rows, batch_size):
+        if connection.vendor == 'postgresql':
+            buffer = io.StringIO()
+            for row in batch:
+                buffer.write('\t'.join(map(_copy_value, row)) + '\n')
+            buffer.seek(0)
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f'COPY {quote(model._meta.db_table)}'
+                    f' ({", ".join(columns)}) FROM STDIN',
+                    buffer,
+                )
+        else:
+            model.objects.bulk_create(
+                [model(**dict(zip(fields, row))) for row in batch],
+                batch_size=batch_size,
+            )
+        loaded += len(batch)
+    return loaded
+
+
+@contextmanager
+def bench_client(user):
+    """Yield an api client authenticated as ``user``"""
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        client = APIClient()
+        client.force_authenticate(user)
+        yield client
+
+
+@contextmanager
+def bench_token_client(token):
+    """Yield an api client sending ``token`` in the auth header"""
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        yield client
+
+
+class QueryCounter:
+    """Execute wrapper counting the queries that pass through it"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """
+    Count the queries run on the default connection in the block.
+
+    Unlike CaptureQueriesContext there is no cap of 9000 entries, and the
+    SQL is neither formatted nor stored.
+    """
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        yield counter
+
+
+def measure(func, repeat=5):
+    """Call ``func`` ``repeat`` times and summarise the timings in ms"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'max': max(samples),
+    }
+
+
+def percentile(samples, pct):
+    """Return the ``pct`` percentile of ``samples`` (nearest rank)"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(samples, elapsed, queries=0):
+    """Latency percentiles, throughput and queries of a request sample"""
+    count = len(samples)
+    return {
+        'requests': count,
+        'mean_ms': statistics.fmean(samples) if samples else 0.0,
+        'p50_ms': percentile(samples, 50),
+        'p90_ms': percentile(samples, 90),
+        'p99_ms': percentile(samples, 99),
+        'max_ms': max(samples, default=0.0),
+        'throughput_rps': count / elapsed if elapsed else 0.0,
+        'queries_per_request': queries / count if count else 0.0,
+    }
+
+
+def viewset_queryset(viewset_class, action, user, params=None, **kwargs):
+    """Return the queryset a viewset action would run for ``user``"""
+    request = Request(RequestFactory().get('/', params or {}))
+    request.user = user
+    view = viewset_class(
+        request=request,
+        action=action,
+        format_kwarg=None,
+        kwargs=kwargs,
+    )
+    return view.filter_queryset(view.get_queryset())
@@ -0,0 +1,22 @@
+"""
+System checks for the core app
+"""
+from django.conf import settings
+from django.core.checks import Error
+
+
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Replicas need the primary pin in a cache every worker shares"""
+    if not settings.DATABASE_REPLICAS or settings.TESTING:
+        return []
+    backend = settings.CACHES[settings.RECIPE_CACHE_ALIAS]['BACKEND']
+    if backend not in settings.LOCAL_CACHE_BACKENDS:
+        return []
+    return [Error(
+        'Read replicas need a shared cache to pin writers to the primary.',
+        hint=(f'{backend} keeps the pin inside one worker, so the others '
+              'read stale rows from a lagging replica. Set CACHE_BACKEND '
+              'to a shared backend such as Redis, or unset '
+              'DB_REPLICA_HOSTS.'),
+        id='core.E001',
+    )]
@@ -0,0 +1,191 @@
+"""
+Bounded in-process pool of psycopg2 connections
+"""
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """No pooled connection became free in time"""
+
+
+class ConnectionPool:
+    """
+    Hand out at most ``max_size`` connections across threads.
+
+    Callers beyond the limit wait up to ``timeout`` seconds for a free
+    connection. Returned connections stay open for reuse, so up to
+    ``max_size`` can be idle; ``min_size`` are opened up front.
+    """
+
+    def __init__(self, connect, min_size, max_size, timeout,
+                 health_checks=False):
+        self._connect = connect
+        self._idle = deque(connect() for _ in range(min(min_size, max_size)))
+        self._in_use = 0
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_checks = health_checks
+        self.conn_params = None
+        self.closed = False
+        self.counters = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'discarded': 0,
+            'wait_ms': 0.0,
+        }
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def acquire(self):
+        """Check out a connection, waiting for a free slot if needed"""
+        if not self._slots.acquire(blocking=False):
+            self._count('waits')
+            start = time.perf_counter()
+            acquired = self._slots.acquire(timeout=self.timeout)
+            self._count('wait_ms', (time.perf_counter() - start) * 1000)
+            if not acquired:
+                self._count('timeouts')
+                raise PoolTimeout(
+                    f'No database connection free after {self.timeout}s')
+        try:
+            connection = self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+        self._count('checkouts')
+        return connection
+
+    def _checkout(self):
+        """Return the most recently used idle connection or a new one"""
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                connection = self._connect()
+            elif self.health_checks and not self._is_usable(connection):
+                self._count('discarded')
+                self._discard(connection)
+                continue
+            with self._lock:
+                self._in_use += 1
+            return connection
+
+    def release(self, connection):
+        """Return a connection, discarding it if it is broken"""
+        try:
+            if not self.closed and self._reset(connection):
+                with self._lock:
+                    self._idle.append(connection)
+            else:
+                self._discard(connection)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def close(self):
+        """Close idle connections, and the others once they come back"""
+        with self._lock:
+            self.closed = True
+            idle, self._idle = self._idle, deque()
+        for connection in idle:
+            self._discard(connection)
+
+    def _reset(self, connection):
+        """Roll back leftover work, False if the connection is unusable"""
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def _is_usable(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            # Outside autocommit the probe opened a transaction, which
+            # would make Django's set_autocommit() fail
+            if not connection.autocommit:
+                connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def stats(self):
+        """Return usage counters and the current pool occupancy"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats.update(
+                in_use=self._in_use,
+                idle=len(self._idle),
+                max_size=self.max_size,
+            )
+        return stats
+
+
+def get_pool(alias, settings_dict, conn_params):
+    """
+    Return the pool of a database alias, creating it on first use.
+
+    A pool is replaced when the connection parameters of its alias
+    change, as they do when the test runner switches to the test
+    database.
+    """
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.conn_params != conn_params:
+            if pool is not None:
+                pool.close()
+            options = settings_dict.get('POOL', {})
+            pool = _pools[alias] = ConnectionPool(
+                lambda: psycopg2.connect(**conn_params),
+                min_size=options.get('MIN_SIZE', 1),
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 5.0),
+                health_checks=settings_dict.get('CONN_HEALTH_CHECKS', False),
+            )
+            pool.conn_params = dict(conn_params)
+        return pool
+
+
+def close_pool(alias):
+    """Close the idle connections of an alias and forget its pool"""
+    with _pools_lock:
+        pool = _pools.pop(alias, None)
+    if pool is not None:
+        pool.close()
+
+
+def pool_for(alias):
+    """Return the pool of a database alias if it has one"""
+    return _pools.get(alias)
+
+
+def pool_stats():
+    """Return the statistics of every pool in this process"""
+    return {alias: pool.stats() for alias, pool in _pools.items()}
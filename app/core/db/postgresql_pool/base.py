@@ -0,0 +1,39 @@
+"""
+PostgreSQL backend that borrows connections from an in-process pool
+"""
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core.db.pool import get_pool
+from core.db.postgresql_pool.creation import DatabaseCreation
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Check connections out of a pool instead of opening new ones.
+
+    Closing the connection, which Django does at the end of each request
+    when CONN_MAX_AGE is 0, returns it to the pool.
+    """
+    creation_class = DatabaseCreation
+    connection_pool = None
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = IsolationLevel(
+            options.get('isolation_level', IsolationLevel.READ_COMMITTED))
+        self.connection_pool = get_pool(self.alias, self.settings_dict,
+                                        conn_params)
+        connection = self.connection_pool.acquire()
+        if 'isolation_level' in options:
+            connection.isolation_level = self.isolation_level
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.connection_pool.release(self.connection)
@@ -0,0 +1,14 @@
+"""
+Test database handling for the pooled PostgreSQL backend
+"""
+from django.db.backends.postgresql import creation
+
+from core.db.pool import close_pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Close pooled connections before the test database is dropped"""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pool(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,93 @@
+"""
+Database router sending recipe reads to replicas
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Models whose reads may be served by a replica
+REPLICA_MODELS = {'core.recipe', 'core.tag', 'core.recipe_tags'}
+PIN_KEY = 'replica:pin:{user_id}'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def allow_replica_reads(allowed):
+    """Allow or forbid replica reads in the current context"""
+    _replica_reads.set(allowed)
+
+
+@contextmanager
+def replica_reads():
+    """Run the block with replica reads allowed"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary(user_id):
+    """Read the user's data from the primary for REPLICA_STICKY_SECONDS"""
+    if settings.DATABASE_REPLICAS:
+        caches[settings.RECIPE_CACHE_ALIAS].set(
+            PIN_KEY.format(user_id=user_id), 1,
+            settings.REPLICA_STICKY_SECONDS)
+
+
+def use_primary_if_pinned(user_id):
+    """Forbid replica reads in this context if the user wrote recently"""
+    if user_id is None or not _replica_reads.get():
+        return
+    cache = caches[settings.RECIPE_CACHE_ALIAS]
+    if cache.get(PIN_KEY.format(user_id=user_id)) is not None:
+        _replica_reads.set(False)
+
+
+def choose_replica():
+    """Pick the replica alias serving the next read"""
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaPinMixin:
+    """Keep a pinned user on the primary once DRF has authenticated it"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        use_primary_if_pinned(request.user.id)
+
+
+class ReplicaRouter:
+    """
+    Route reads of recipe models to a replica when the request allows it.
+
+    Writes, reads inside a transaction and reads of any other model stay
+    on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not (settings.DATABASE_REPLICAS and _replica_reads.get()):
+            return None
+        if model._meta.label_lower not in REPLICA_MODELS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
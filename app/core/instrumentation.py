@@ -0,0 +1,214 @@
+"""
+Per-request performance metrics
+"""
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger('core.performance')
+
+# Upper bounds of the histogram buckets in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+              float('inf'))
+TIMED_METRICS = ('total', 'db', 'serialize', 'render')
+
+_current = ContextVar('request_metrics', default=None)
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+class RequestMetrics:
+    """Timings and counters collected while serving one request"""
+
+    def __init__(self):
+        self.tag = 'unresolved'
+        self.start = time.perf_counter()
+        self.timings = dict.fromkeys(TIMED_METRICS, 0.0)
+        self.queries = 0
+        self.response_bytes = None
+        self._render_start = None
+
+    def add(self, name, started):
+        self.timings[name] += (time.perf_counter() - started) * 1000
+
+    def render_started(self):
+        self._render_start = time.perf_counter()
+
+    def render_finished(self, response):
+        if self._render_start is not None:
+            self.add('render', self._render_start)
+            self._render_start = None
+
+    def finish(self, response):
+        self.timings['total'] = (time.perf_counter() - self.start) * 1000
+        if not response.streaming:
+            self.response_bytes = len(response.content)
+
+    def server_timing(self):
+        """Value of the ``Server-Timing`` header"""
+        return ', '.join([
+            f'db;dur={self.timings["db"]:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.timings["serialize"]:.1f}',
+            f'render;dur={self.timings["render"]:.1f}',
+            f'total;dur={self.timings["total"]:.1f}',
+        ])
+
+    def as_record(self, request, response):
+        return {
+            'tag': self.tag,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': self.queries,
+            'bytes': self.response_bytes,
+            **{f'{name}_ms': round(value, 2)
+               for name, value in self.timings.items()},
+        }
+
+
+def begin_request():
+    """Start collecting metrics for the current request"""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_metrics():
+    """Metrics of the request being served, if it is sampled"""
+    return _current.get()
+
+
+def query_wrapper(execute, sql, params, many, context):
+    """``execute_wrapper`` hook timing the queries of sampled requests"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.add('db', started)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver adding ``query_wrapper``.
+
+    Connections are per thread and under ASGI the ORM runs in
+    sync_to_async threads, so every connection gets the hook and finds
+    the request's metrics through the context.
+    """
+    if query_wrapper not in connection.execute_wrappers:
+        # First, so execute_wrapper() blocks still pop their own hook
+        connection.execute_wrappers.insert(0, query_wrapper)
+
+
+@contextmanager
+def timed(name):
+    """Add the duration of the block to a metric of the current request"""
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.add(name, started)
+
+
+class Histogram:
+    """Fixed bucket histogram of millisecond durations"""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS_MS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile"""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if count and seen >= rank:
+                return bound if bound != float('inf') else '+Inf'
+        return None
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': {
+                str(bound): count
+                for bound, count in zip(BUCKETS_MS, self.counts) if count
+            },
+        }
+
+
+def record_request(request, response, metrics):
+    """Log a sampled request and add it to the histograms"""
+    record = metrics.as_record(request, response)
+    logger.info(json.dumps(record, sort_keys=True))
+    with _histograms_lock:
+        for name, value in metrics.timings.items():
+            key = (metrics.tag, name)
+            if key not in _histograms:
+                _histograms[key] = Histogram()
+            _histograms[key].observe(value)
+
+
+def histogram_snapshot():
+    """Return the histograms of this process grouped by tag"""
+    snapshot = {}
+    with _histograms_lock:
+        for (tag, name), histogram in sorted(_histograms.items()):
+            snapshot.setdefault(tag, {})[name] = histogram.snapshot()
+    return snapshot
+
+
+def reset_histograms():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+class _TimedSerializer:
+    """Proxy timing access to ``data`` of a wrapped serializer"""
+
+    def __init__(self, serializer):
+        self.__dict__['_serializer'] = serializer
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return self._serializer.data
+
+    def __getattr__(self, name):
+        return getattr(self._serializer, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._serializer, name, value)
+
+
+class InstrumentedViewMixin:
+    """Count the time views spend building serializer data"""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if current_metrics() is None:
+            return serializer
+        return _TimedSerializer(serializer)
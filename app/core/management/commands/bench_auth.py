@@ -0,0 +1,69 @@
+"""
+Django command to benchmark cached token authentication
+"""
+import time
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core import benchmark
+from user.authentication import CachedTokenAuthentication, forget_token
+from user.views import ManageUserView
+
+
+class Command(BaseCommand):
+    """Compare requests per second with and without the token cache"""
+    help = 'Time authenticated requests with plain and cached tokens'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--ttl', type=int, default=30,
+                            help='Per-process token cache lifetime')
+        parser.add_argument('--shared-cache', default='default',
+                            help='Cache alias for the shared token cache')
+
+    def handle(self, *args, **options):
+        url = reverse('user:me')
+        total = options['requests']
+        alias = options['shared_cache']
+        shared = {'AUTH_TOKEN_SHARED_CACHE': alias}
+        local = {'AUTH_TOKEN_SHARED_CACHE': '',
+                 'AUTH_TOKEN_CACHE_TTL': options['ttl']}
+        setups = [
+            ('token', TokenAuthentication, {}),
+            ('local cache', CachedTokenAuthentication, local),
+            ('shared cache', CachedTokenAuthentication, shared),
+        ]
+
+        with benchmark.scratch_data():
+            user = benchmark.create_bench_user()
+            token = Token.objects.create(user=user)
+
+            self.stdout.write(
+                f'shared cache: {alias}'
+                f' ({settings.CACHES[alias]["BACKEND"]})')
+            self.stdout.write(
+                f'{"authentication":>14} {"req/s":>10} {"queries/req":>12}')
+            with benchmark.bench_token_client(token) as client:
+                for name, backend, overrides in setups:
+                    with override_settings(**overrides), \
+                            patch.object(ManageUserView,
+                                         'authentication_classes',
+                                         [backend]):
+                        forget_token(token.key)
+                        client.get(url)
+                        with benchmark.count_queries() as queries:
+                            start = time.perf_counter()
+                            for _ in range(total):
+                                client.get(url)
+                            elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f'{name:>14} {total / elapsed:>10.0f}'
+                        f' {queries.count / total:>12.2f}'
+                    )
+            forget_token(token.key)
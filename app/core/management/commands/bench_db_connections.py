@@ -0,0 +1,60 @@
+"""
+Django command to benchmark database connection reuse
+"""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core import benchmark
+from core.db.pool import pool_for
+
+POOLED_ALIAS = 'bench_pooled'
+
+
+def _request(connection, close):
+    """One request worth of connection handling around a small query"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    if close:
+        connection.close()
+
+
+class Command(BaseCommand):
+    """Compare fresh, persistent and pooled connections"""
+    help = 'Time per-request connection overhead against the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        default = connections[DEFAULT_DB_ALIAS]
+        modes = [
+            ('fresh', default, True),
+            ('persistent', default, False),
+        ]
+        if default.vendor == 'postgresql':
+            connections.settings[POOLED_ALIAS] = {
+                **default.settings_dict,
+                'ENGINE': 'core.db.postgresql_pool',
+            }
+            modes.append(('pooled', connections[POOLED_ALIAS], True))
+        else:
+            self.stdout.write(self.style.WARNING(
+                'Pooled mode needs PostgreSQL, skipping it'))
+
+        self.stdout.write(
+            f'{"mode":>10} {"min ms":>8} {"median ms":>10} {"max ms":>8}')
+        for name, connection, close in modes:
+            connection.close()
+            _request(connection, close)
+            timing = benchmark.measure(
+                lambda: _request(connection, close), options['requests'])
+            self.stdout.write(
+                f'{name:>10} {timing["min"]:>8.3f}'
+                f' {timing["median"]:>10.3f} {timing["max"]:>8.3f}'
+            )
+            connection.close()
+
+        pool = pool_for(POOLED_ALIAS)
+        if pool is not None:
+            self.stdout.write(f'Pool: {pool.stats()}')
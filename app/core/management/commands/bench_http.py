@@ -0,0 +1,100 @@
+"""
+Django command to compare HTTP throughput of running app servers
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+async def _request(reader, writer, host, target, headers):
+    """Send one keep-alive GET and return its status code"""
+    lines = [f'GET {target} HTTP/1.1', f'Host: {host}',
+             'Accept: application/json', *headers, '', '']
+    writer.write('\r\n'.join(lines).encode())
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by server')
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def _connection(url, headers, deadline, latencies, failures):
+    """Drive one persistent connection until the deadline"""
+    parts = urlsplit(url)
+    target = parts.path or '/'
+    if parts.query:
+        target = f'{target}?{parts.query}'
+    reader, writer = await asyncio.open_connection(
+        parts.hostname, parts.port or 80)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = await _request(reader, writer, parts.netloc,
+                                    target, headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                failures.append(status)
+    finally:
+        writer.close()
+
+
+async def _load(url, headers, concurrency, duration):
+    deadline = time.perf_counter() + duration
+    latencies, failures = [], []
+    await asyncio.gather(*(
+        _connection(url, headers, deadline, latencies, failures)
+        for _ in range(concurrency)
+    ))
+    return latencies, failures
+
+
+class Command(BaseCommand):
+    """Load running servers over keep-alive connections"""
+    help = ('Compare requests/sec and latency of WSGI and ASGI deployments'
+            ' started with the same worker count')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='+', metavar='LABEL=URL',
+            help='e.g. wsgi=http://localhost:8000/api/recipe/recipes/',
+        )
+        parser.add_argument('--token', help='API token to send')
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--duration', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        headers = []
+        if options['token']:
+            headers.append(f'Authorization: Token {options["token"]}')
+
+        self.stdout.write(
+            f'{"server":>8} {"conns":>6} {"req/s":>9} {"p50 ms":>8}'
+            f' {"p99 ms":>8} {"errors":>7}'
+        )
+        for target in options['targets']:
+            label, sep, url = target.partition('=')
+            if not sep:
+                raise CommandError(f'Expected LABEL=URL, got {target!r}')
+            latencies, failures = asyncio.run(_load(
+                url, headers, options['concurrency'], options['duration']))
+            self.stdout.write(
+                f'{label:>8} {options["concurrency"]:>6}'
+                f' {len(latencies) / options["duration"]:>9.0f}'
+                f' {benchmark.percentile(latencies, 50):>8.2f}'
+                f' {benchmark.percentile(latencies, 99):>8.2f}'
+                f' {len(failures):>7}'
+            )
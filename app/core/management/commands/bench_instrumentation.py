@@ -0,0 +1,58 @@
+"""
+Django command to measure the cost of request instrumentation
+"""
+import logging
+import statistics
+import time
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    """Time the same request unsampled, at the configured rate and always"""
+    help = 'Show the latency added by PerformanceMiddleware sampling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--recipes', type=int, default=20)
+
+    def handle(self, *args, **options):
+        url = reverse('recipe:recipe-list')
+        total = options['requests']
+        rates = sorted({0.0, settings.PERF_SAMPLE_RATE, 1.0})
+        logger = logging.getLogger('core.performance')
+
+        with benchmark.scratch_data(), \
+                override_settings(RECIPE_CACHE_TIMEOUT=0), \
+                patch.object(logger, 'handlers', [logging.NullHandler()]):
+            user = benchmark.create_bench_user()
+            benchmark.seed_recipes(user, options['recipes'])
+
+            samples = {rate: [] for rate in rates}
+            with benchmark.bench_client(user) as client:
+                client.get(url)
+                # Interleave the rates so drift affects them alike
+                for _ in range(total):
+                    for rate in rates:
+                        with override_settings(PERF_SAMPLE_RATE=rate):
+                            start = time.perf_counter()
+                            client.get(url)
+                            samples[rate].append(time.perf_counter() - start)
+
+        baseline = statistics.median(samples[0.0])
+        self.stdout.write(
+            f'{"sample rate":>11} {"p50 ms":>8} {"mean ms":>8}'
+            f' {"overhead":>9}')
+        for rate in rates:
+            median = statistics.median(samples[rate])
+            self.stdout.write(
+                f'{rate:>11.2f} {median * 1000:>8.3f}'
+                f' {statistics.fmean(samples[rate]) * 1000:>8.3f}'
+                f' {(median / baseline - 1) * 100:>8.1f}%'
+            )
@@ -0,0 +1,86 @@
+"""
+Django command to load test other endpoints during a login storm
+"""
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import benchmark
+
+PASSWORD = 'storm-pass-123'
+
+
+class Command(BaseCommand):
+    """Measure read latency alone and while logins hammer the hasher"""
+    help = 'Show p50/p99 of authenticated reads during a login storm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--logins', type=int, default=16)
+
+    def handle(self, *args, **options):
+        user_model = get_user_model()
+        reader = user_model.objects.create_user(
+            email='storm-reader@example.com')
+        login = user_model.objects.create_user(
+            email='storm-login@example.com', password=PASSWORD)
+        token = Token.objects.create(user=reader)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                self.stdout.write(
+                    f'{"phase":>8} {"reads":>7} {"p50 ms":>8}'
+                    f' {"p99 ms":>8} {"logins":>7} {"503s":>6}'
+                )
+                for phase, logins in (('baseline', 0),
+                                      ('storm', options['logins'])):
+                    self._run_phase(phase, token, login.email,
+                                    options['readers'], logins,
+                                    options['duration'])
+        finally:
+            reader.delete()
+            login.delete()
+
+    def _run_phase(self, phase, token, email, readers, logins, duration):
+        deadline = time.perf_counter() + duration
+        latencies = []
+        statuses = []
+
+        def read():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+            url = reverse('user:me')
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                client.get(url)
+                latencies.append((time.perf_counter() - start) * 1000)
+            connections.close_all()
+
+        def log_in():
+            client = APIClient()
+            url = reverse('user:token')
+            payload = {'email': email, 'password': PASSWORD}
+            while time.perf_counter() < deadline:
+                statuses.append(client.post(url, payload).status_code)
+            connections.close_all()
+
+        threads = [threading.Thread(target=read) for _ in range(readers)]
+        threads += [threading.Thread(target=log_in) for _ in range(logins)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.stdout.write(
+            f'{phase:>8} {len(latencies):>7}'
+            f' {benchmark.percentile(latencies, 50):>8.2f}'
+            f' {benchmark.percentile(latencies, 99):>8.2f}'
+            f' {len(statuses):>7} {statuses.count(503):>6}'
+        )
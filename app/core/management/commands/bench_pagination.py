@@ -0,0 +1,74 @@
+"""
+Django command to benchmark keyset pagination of the recipe list
+"""
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.pagination import Cursor, LimitOffsetPagination
+
+from core import benchmark
+from core.models import Recipe
+from recipe.pagination import RecipeCursorPagination
+from recipe.views import RecipeViewSet
+
+
+class OffsetPagination(LimitOffsetPagination):
+    """OFFSET pages swapped into the recipe list for comparison"""
+    max_limit = RecipeCursorPagination.max_page_size
+
+
+class Command(BaseCommand):
+    """Compare cursor pages against OFFSET pages of the same endpoint"""
+    help = 'Show recipe list latency from page 1 to page 1000'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--pages', default='1,10,100,1000')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        pages = [int(page) for page in options['pages'].split(',')]
+        repeat = options['repeat']
+        url = reverse('recipe:recipe-list')
+
+        # Both paginators go through the same view, serializer and
+        # renderer; only the page query differs.
+        with benchmark.scratch_data(), \
+                override_settings(RECIPE_CACHE_TIMEOUT=0):
+            user = benchmark.create_bench_user()
+            benchmark.seed_recipes(user, max(pages) * page_size)
+            queryset = Recipe.objects.filter(user=user).order_by('-id')
+            ids = list(queryset.values_list('id', flat=True))
+
+            paginator = RecipeCursorPagination()
+            paginator.base_url = f'{url}?page_size={page_size}'
+
+            self.stdout.write(
+                f'{"page":>6} {"cursor api ms":>14} {"offset api ms":>14}'
+            )
+            with benchmark.bench_client(user) as client:
+                for page in pages:
+                    offset = (page - 1) * page_size
+                    if offset:
+                        page_url = paginator.encode_cursor(Cursor(
+                            offset=0,
+                            reverse=False,
+                            position=str(ids[offset - 1]),
+                        ))
+                    else:
+                        page_url = paginator.base_url
+
+                    cursor = benchmark.measure(
+                        lambda: client.get(page_url), repeat)
+                    offset_params = {'limit': page_size, 'offset': offset}
+                    with patch.object(RecipeViewSet, 'pagination_class',
+                                      OffsetPagination):
+                        offset_page = benchmark.measure(
+                            lambda: client.get(url, offset_params), repeat)
+                    self.stdout.write(
+                        f'{page:>6} {cursor["median"]:>14.2f}'
+                        f' {offset_page["median"]:>14.2f}'
+                    )
@@ -0,0 +1,49 @@
+"""
+Django command to benchmark recipe search
+"""
+from django.core.management.base import BaseCommand
+
+from core import benchmark
+from core.models import Recipe
+from recipe import search
+
+
+class Command(BaseCommand):
+    """Compare tsvector search with icontains scans"""
+    help = 'Time full-text recipe search against icontains scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--term', default='lasagna')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        term = options['term']
+
+        with benchmark.scratch_data():
+            user = benchmark.create_bench_user()
+            benchmark.seed_recipes(user, options['recipes'])
+            recipes = Recipe.objects.filter(user=user)
+            queries = [
+                ('icontains', search.scan_recipes(recipes, term)
+                 .order_by('-id')),
+            ]
+            if search.full_text_available():
+                search.update_search_vectors(
+                    list(recipes.values_list('id', flat=True)))
+                queries.append(
+                    ('tsvector', search.search_recipes(recipes, term)))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    'Full-text search needs Postgres; timing the scan only.'))
+
+            self.stdout.write(
+                f'{"query":>10} {"rows":>8} {"median ms":>10} {"max ms":>8}')
+            for name, queryset in queries:
+                rows = len(list(queryset))
+                timing = benchmark.measure(
+                    lambda: list(queryset.all()), options['repeat'])
+                self.stdout.write(
+                    f'{name:>10} {rows:>8} {timing["median"]:>10.2f}'
+                    f' {timing["max"]:>8.2f}'
+                )
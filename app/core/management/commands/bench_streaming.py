@@ -0,0 +1,46 @@
+"""
+Django command to benchmark memory of the recipe list response
+"""
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    """Compare peak memory of the JSON and streaming list paths"""
+    help = 'Show peak memory of buffered and streamed recipe lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        url = reverse('recipe:recipe-list')
+
+        with benchmark.scratch_data():
+            user = benchmark.create_bench_user()
+            benchmark.seed_recipes(user, options['recipes'])
+
+            with benchmark.bench_client(user) as client:
+                paths = [
+                    ('json', lambda: len(client.get(url).content)),
+                    ('ndjson', lambda: self._consume(
+                        client.get(url, {'stream': 'ndjson'}))),
+                    ('csv', lambda: self._consume(
+                        client.get(url, {'stream': 'csv'}))),
+                ]
+                self.stdout.write(f'{"mode":>8} {"bytes":>12} {"peak MiB":>9}')
+                for name, fetch in paths:
+                    tracemalloc.start()
+                    size = fetch()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    self.stdout.write(
+                        f'{name:>8} {size:>12} {peak / 2 ** 20:>9.1f}'
+                    )
+
+    def _consume(self, response):
+        """Read a streaming response chunk by chunk"""
+        return sum(len(chunk) for chunk in response.streaming_content)
@@ -0,0 +1,187 @@
+"""
+Django command running the recipe api benchmark scenarios
+"""
+import io
+import json
+import platform
+import time
+from itertools import count
+
+import django
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import benchmark
+from core.models import Recipe
+
+PASSWORD = 'bench-pass-123'
+SCENARIOS = ('list', 'filter_tags', 'create_with_tags', 'update',
+             'upload_image', 'login')
+# Metrics whose increase between two runs counts as a regression
+COMPARED_METRICS = ('p50_ms', 'p99_ms', 'queries_per_request')
+
+
+def _jpeg():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), 'orange').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    """Seed a scale, run scripted scenarios and report JSON results"""
+    help = ('Benchmark list, filter, create, update, upload and login'
+            ' scenarios, or compare two result files')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--login-requests', type=int, default=5)
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+        parser.add_argument('--cache', action='store_true',
+                            help='Keep the response cache enabled')
+        parser.add_argument('--output', help='Write JSON here')
+        parser.add_argument(
+            '--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+            help='Compare two result files instead of running',
+        )
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed relative slowdown')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self._compare(*options['compare'], options['threshold'])
+
+        names = options['scenarios'].split(',')
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(unknown)}')
+
+        overrides = {'ALLOWED_HOSTS': ['testserver']}
+        if not options['cache']:
+            overrides['RECIPE_CACHE_TIMEOUT'] = 0
+        with benchmark.scratch_data(), override_settings(**overrides):
+            results = self._run(names, options)
+
+        report = json.dumps({
+            'meta': {
+                'recipes': options['recipes'],
+                'tags': options['tags'],
+                'tags_per_recipe': options['tags_per_recipe'],
+                'cache': options['cache'],
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                           time.gmtime()),
+            },
+            'scenarios': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+        self.stdout.write(report)
+
+    def _run(self, names, options):
+        user = benchmark.create_bench_user()
+        user.set_password(PASSWORD)
+        user.save()
+        benchmark.seed_recipes(user, options['recipes'])
+        tags = benchmark.seed_tags(user, options['tags'])
+        if tags:
+            benchmark.tag_recipes(user, tags, options['tags_per_recipe'])
+        token = Token.objects.create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        recipes_url = reverse('recipe:recipe-list')
+        recipe = Recipe.objects.filter(user=user).order_by('id').first()
+        detail_url = reverse('recipe:recipe-detail', args=[recipe.id])
+        upload_url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+        tag_names = [tag.name for tag in tags[:2]]
+        tag_ids = ','.join(str(tag.id) for tag in tags[:3])
+        image = _jpeg()
+        serial = count()
+
+        def new_tags():
+            return [{'name': name} for name in tag_names] + \
+                [{'name': f'Bench {next(serial)}'}]
+
+        scenarios = {
+            'list': lambda: client.get(recipes_url, {'page_size': 50}),
+            'filter_tags': lambda: client.get(
+                recipes_url, {'tags': tag_ids, 'page_size': 50}),
+            'create_with_tags': lambda: client.post(recipes_url, {
+                'title': 'Bench recipe', 'time_minutes': 10,
+                'price': '5.00', 'tags': new_tags(),
+            }, format='json'),
+            'update': lambda: client.patch(detail_url, {
+                'title': f'Bench {next(serial)}', 'tags': new_tags(),
+            }, format='json'),
+            'upload_image': lambda: client.post(upload_url, {
+                'image': SimpleUploadedFile('bench.jpg', image,
+                                            'image/jpeg'),
+            }, format='multipart'),
+            'login': lambda: APIClient().post(reverse('user:token'), {
+                'email': user.email, 'password': PASSWORD}),
+        }
+
+        results = {}
+        for name in names:
+            requests = options['login_requests'] if name == 'login' \
+                else options['requests']
+            results[name] = self._measure(scenarios[name], requests)
+            self.stderr.write(f'{name}: p50 {results[name]["p50_ms"]:.2f}'
+                              f' ms, p99 {results[name]["p99_ms"]:.2f} ms')
+        return results
+
+    def _measure(self, request, requests):
+        request()
+        samples = []
+        with benchmark.count_queries() as queries:
+            start = time.perf_counter()
+            for _ in range(requests):
+                began = time.perf_counter()
+                response = request()
+                samples.append((time.perf_counter() - began) * 1000)
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f'{response.status_code}: {response.content[:200]}')
+            elapsed = time.perf_counter() - start
+        return benchmark.summarize(samples, elapsed, queries.count)
+
+    def _compare(self, baseline_path, current_path, threshold):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['scenarios']
+        with open(current_path) as current_file:
+            current = json.load(current_file)['scenarios']
+
+        regressions = []
+        self.stdout.write(
+            f'{"scenario":>17} {"metric":>20} {"baseline":>10}'
+            f' {"current":>10} {"change":>8}')
+        for name in sorted(set(baseline) & set(current)):
+            for metric in COMPARED_METRICS:
+                before = baseline[name][metric]
+                after = current[name][metric]
+                change = (after - before) / before if before else 0.0
+                flag = ''
+                # Query counts are deterministic, any increase counts
+                limit = 0 if metric == 'queries_per_request' else threshold
+                if change > limit or (not before and after):
+                    flag = '  REGRESSION'
+                    regressions.append(f'{name}.{metric}')
+                self.stdout.write(
+                    f'{name:>17} {metric:>20} {before:>10.2f}'
+                    f' {after:>10.2f} {change:>+8.0%}{flag}')
+
+        if regressions:
+            raise CommandError(f'Regressions: {", ".join(regressions)}')
+        self.stdout.write(self.style.SUCCESS('No regressions'))
@@ -0,0 +1,49 @@
+"""
+Django command to benchmark recipe filtering by tags
+"""
+from django.core.management.base import BaseCommand
+
+from core import benchmark
+from core.models import Recipe
+from recipe.filters import filter_all_tags, filter_any_tags
+
+
+class Command(BaseCommand):
+    """Compare DISTINCT joins with semi-join and grouped tag filters"""
+    help = 'Time the recipe tag filter query plans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--filter-tags', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with benchmark.scratch_data():
+            user = benchmark.create_bench_user()
+            benchmark.seed_recipes(user, options['recipes'])
+            tags = benchmark.seed_tags(user, options['tags'])
+            benchmark.tag_recipes(user, tags, options['tags_per_recipe'])
+
+            tag_ids = [tag.id for tag in tags[:options['filter_tags']]]
+            recipes = Recipe.objects.filter(user=user)
+            queries = [
+                ('distinct join', recipes.filter(
+                    tags__id__in=tag_ids).order_by('-id').distinct()),
+                ('exists (any)',
+                 filter_any_tags(recipes, tag_ids).order_by('-id')),
+                ('grouped (all)',
+                 filter_all_tags(recipes, tag_ids).order_by('-id')),
+            ]
+
+            self.stdout.write(
+                f'{"query":>14} {"rows":>8} {"median ms":>10} {"max ms":>8}')
+            for name, queryset in queries:
+                rows = len(list(queryset))
+                timing = benchmark.measure(
+                    lambda: list(queryset.all()), options['repeat'])
+                self.stdout.write(
+                    f'{name:>14} {rows:>8} {timing["median"]:>10.2f}'
+                    f' {timing["max"]:>8.2f}'
+                )
@@ -0,0 +1,31 @@
+"""
+Django command to precompute the OpenAPI schema
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.schema import read_schema, write_schema
+
+
+class Command(BaseCommand):
+    """Generate the schema served by the api-schema view"""
+    help = ('Write the OpenAPI schema with a fingerprint of the code so'
+            ' workers serve it without introspecting the views')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Defaults to SCHEMA_CACHE_PATH')
+        parser.add_argument('--check', action='store_true',
+                            help='Fail if the stored schema is stale')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            if read_schema(options['path']) is None:
+                raise CommandError('Stored schema is missing or stale')
+            self.stdout.write(self.style.SUCCESS('Stored schema is current'))
+            return
+
+        start = time.perf_counter()
+        path = write_schema(options['path'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {path} in {time.perf_counter() - start:.2f}s'))
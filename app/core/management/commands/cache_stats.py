@@ -0,0 +1,18 @@
+"""
+Django command to report recipe response cache counters
+"""
+from django.core.management.base import BaseCommand
+
+from recipe.cache import cache_stats
+
+
+class Command(BaseCommand):
+    """Print cache hit and miss counters"""
+    help = 'Report hit and miss counters of the recipe response cache'
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        self.stdout.write(
+            f'hits={stats["hits"]} misses={stats["misses"]}'
+            f' hit_ratio={stats["hit_ratio"]:.2%}'
+        )
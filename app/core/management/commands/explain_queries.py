@@ -0,0 +1,59 @@
+"""
+Django command to show query plans of the recipe viewsets
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core import benchmark
+from core.models import Recipe, Tag
+from recipe.views import RecipeViewSet, TagViewSet
+
+
+class Command(BaseCommand):
+    """Run EXPLAIN for each viewset query against seeded data"""
+    help = 'Show the plans of the recipe and tag viewset queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+
+    def handle(self, *args, **options):
+        analyze = connection.vendor == 'postgresql'
+
+        with benchmark.scratch_data():
+            user = benchmark.create_bench_user()
+            benchmark.seed_recipes(user, options['recipes'])
+            tags = benchmark.seed_tags(user, options['tags'])
+            benchmark.tag_recipes(user, tags, options['tags_per_recipe'])
+            if analyze:
+                with connection.cursor() as cursor:
+                    for model in (Recipe, Tag, Recipe.tags.through):
+                        cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+            recipe = Recipe.objects.filter(user=user).first()
+            tag_ids = f'{tags[0].id},{tags[1].id}'
+            queries = [
+                ('recipe list', 'recipe_user_id_desc_idx',
+                 benchmark.viewset_queryset(RecipeViewSet, 'list', user)),
+                ('recipe retrieve', None,
+                 benchmark.viewset_queryset(
+                     RecipeViewSet, 'retrieve', user
+                 ).filter(pk=recipe.pk)),
+                ('recipe list by tags', 'core_recipe_tags_tag_recipe_idx',
+                 benchmark.viewset_queryset(
+                     RecipeViewSet, 'list', user, {'tags': tag_ids})),
+                ('tag list', 'unique_tag_name_per_user',
+                 benchmark.viewset_queryset(TagViewSet, 'list', user)),
+            ]
+            for name, index, queryset in queries:
+                plan = queryset.explain(analyze=True) if analyze \
+                    else queryset.explain()
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(plan)
+                if index:
+                    used = index in plan
+                    style = self.style.SUCCESS if used else self.style.WARNING
+                    self.stdout.write(style(
+                        f'uses {index}: {"yes" if used else "no"}'))
+                self.stdout.write('')
@@ -0,0 +1,74 @@
+"""
+Django command to remove orphaned recipe image files
+"""
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from core.models import Recipe
+from core.storage import iter_files
+from recipe.images import IMAGE_FILE_FIELDS
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def reference_counts(names):
+    """Count the references to each stored file in ``names``"""
+    counts = dict.fromkeys(names, 0)
+    for field in IMAGE_FILE_FIELDS:
+        rows = Recipe.objects.filter(**{f'{field}__in': names})\
+            .values(field).annotate(refs=Count('id'))\
+            .values_list(field, 'refs')
+        for name, refs in rows:
+            counts[name] += refs
+    return counts
+
+
+class Command(BaseCommand):
+    """Delete unreferenced image files and report storage savings"""
+    help = 'Garbage collect recipe image files no recipe refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Keep files younger than this many seconds',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field('image').storage
+        directory = os.path.join('uploads', 'recipe')
+        cutoff = time.time() - options['min_age']
+
+        files = stored = referenced = removed = reclaimed = 0
+        if os.path.isdir(storage.path(directory)):
+            entries = iter_files(storage, directory)
+            for batch in batched(entries, options['batch_size']):
+                counts = reference_counts([name for name, _, _ in batch])
+                for name, size, mtime in batch:
+                    files += 1
+                    stored += size
+                    referenced += size * counts[name]
+                    if counts[name] or mtime > cutoff:
+                        continue
+                    removed += 1
+                    reclaimed += size
+                    if not options['dry_run']:
+                        storage.delete(name)
+
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(f'Files on disk:     {files}')
+        self.stdout.write(f'Bytes on disk:     {stored}')
+        self.stdout.write(f'Bytes referenced:  {referenced}')
+        self.stdout.write(
+            f'Saved by sharing:  {max(referenced - (stored - reclaimed), 0)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {removed} orphaned files ({reclaimed} bytes)'))
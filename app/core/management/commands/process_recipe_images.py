@@ -0,0 +1,32 @@
+"""
+Django command to process recipe images waiting for renditions
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.images import process_recipe_image
+
+
+class Command(BaseCommand):
+    """Build renditions for pending (and optionally failed) images"""
+    help = 'Build thumbnail and medium renditions for pending images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true')
+
+    def handle(self, *args, **options):
+        statuses = [Recipe.ImageStatus.PENDING]
+        if options['retry_failed']:
+            statuses.append(Recipe.ImageStatus.FAILED)
+        recipe_ids = Recipe.objects.filter(image_status__in=statuses)\
+            .values_list('id', flat=True)
+
+        results = {}
+        for recipe_id in recipe_ids.iterator():
+            result = process_recipe_image(recipe_id)
+            results[result] = results.get(result, 0) + 1
+
+        self.stdout.write(self.style.SUCCESS(
+            ' '.join(f'{key}={value}' for key, value in results.items())
+            or 'Nothing to process'
+        ))
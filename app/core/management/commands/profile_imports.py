@@ -0,0 +1,64 @@
+"""
+Django command to profile the imports done while a worker boots
+"""
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+LOAD_URLS = 'from django.urls import get_resolver; get_resolver().url_patterns'
+
+
+def parse_importtime(output):
+    """Yield (module, self us, cumulative us) from ``-X importtime``"""
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        yield fields[2].strip(), int(fields[0]), int(fields[1])
+
+
+class Command(BaseCommand):
+    """Report the slowest imports of the WSGI application"""
+    help = ('Import the WSGI application in a fresh interpreter with'
+            ' -X importtime and list the slowest modules')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module',
+            default=settings.WSGI_APPLICATION.rsplit('.', 1)[0],
+            help='Module to import, defaults to the WSGI module',
+        )
+        parser.add_argument('--urls', action='store_true',
+                            help='Also load the URLconf like a first request')
+        parser.add_argument('--limit', type=int, default=25)
+        parser.add_argument('--sort', choices=('cumulative', 'self'),
+                            default='cumulative')
+
+    def handle(self, *args, **options):
+        script = f'import {options["module"]}'
+        if options['urls']:
+            script = f'{script}; {LOAD_URLS}'
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            cwd=settings.BASE_DIR, env=os.environ.copy(),
+            capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        imports = list(parse_importtime(result.stderr))
+        column = 2 if options['sort'] == 'cumulative' else 1
+        imports.sort(key=lambda item: item[column], reverse=True)
+        total = sum(item[1] for item in imports)
+
+        self.stdout.write(f'{"cumulative ms":>14} {"self ms":>9}  module')
+        for module, own, cumulative in imports[:options['limit']]:
+            self.stdout.write(
+                f'{cumulative / 1000:>14.1f} {own / 1000:>9.1f}  {module}')
+        self.stdout.write(
+            f'{len(imports)} modules imported in {total / 1000:.1f} ms')
@@ -0,0 +1,165 @@
+"""
+Django command to seed users, recipes and tags for load testing
+"""
+import random
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core import benchmark
+from core.models import Recipe, Tag
+from recipe.search import full_text_available, search_document
+
+EMAIL = 'seed-{index}@example.com'
+USER_FIELDS = ('email', 'name', 'password', 'is_active', 'is_staff',
+               'is_superuser')
+TAG_FIELDS = ('user_id', 'name', 'updated_at')
+RECIPE_FIELDS = ('user_id', 'title', 'description', 'time_minutes', 'price',
+                 'link', 'image_hash', 'image_status', 'updated_at')
+LINK_FIELDS = ('recipe_id', 'tag_id')
+TOKEN_FIELDS = ('key', 'user_id', 'created')
+
+
+EMAIL_PREFIX, EMAIL_SUFFIX = EMAIL.split('{index}')
+
+
+def seeded_users(queryset):
+    return queryset.filter(email__startswith=EMAIL_PREFIX,
+                           email__endswith=EMAIL_SUFFIX)
+
+
+def next_index(queryset):
+    """First email index past every seeded user, so reruns add users"""
+    indexes = (
+        email[len(EMAIL_PREFIX):-len(EMAIL_SUFFIX)]
+        for email in seeded_users(queryset)
+        .values_list('email', flat=True).iterator()
+    )
+    return max((int(index) + 1 for index in indexes if index.isdigit()),
+               default=0)
+
+
+class Command(BaseCommand):
+    """Create load test users owning recipes and tags"""
+    help = ('Seed users, recipes and tags at a configurable scale, loading'
+            ' rows with COPY on PostgreSQL')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--recipes', type=int, default=10000,
+                            help='Recipes per user')
+        parser.add_argument('--tags', type=int, default=50,
+                            help='Tags per user')
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--password', default='seed-pass-123')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed making the data reproducible,'
+                                 ' token keys are always random')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete previously seeded users first,'
+                                 ' otherwise new users are added')
+
+    def handle(self, *args, **options):
+        user_model = get_user_model()
+        if options['flush']:
+            deleted, _ = seeded_users(user_model.objects).delete()
+            self.stdout.write(f'Deleted {deleted} seeded rows')
+
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.batch_size = options['batch_size']
+        with transaction.atomic():
+            tokens = self._seed(user_model, options)
+
+        for email, key in tokens:
+            self.stdout.write(f'{email} token={key}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {options["users"]} users with {options["recipes"]}'
+            f' recipes and {options["tags"]} tags each'
+        ))
+
+    def _seed(self, user_model, options):
+        # One hash shared by every seeded user instead of one per user
+        password = make_password(options['password'])
+        start = next_index(user_model.objects)
+        emails = [EMAIL.format(index=index)
+                  for index in range(start, start + options['users'])]
+        self._load(user_model, USER_FIELDS, (
+            (email, '', password, True, False, False) for email in emails
+        ))
+        user_ids = dict(user_model.objects.filter(email__in=emails)
+                        .values_list('email', 'id'))
+        users = [user_ids[email] for email in emails]
+
+        self._load(Tag, TAG_FIELDS, self._tag_rows(users, options['tags']))
+        tags = defaultdict(list)
+        for user_id, tag_id in Tag.objects.filter(user_id__in=users)\
+                .order_by('id').values_list('user_id', 'id').iterator():
+            tags[user_id].append(tag_id)
+
+        self._load(Recipe, RECIPE_FIELDS,
+                   self._recipe_rows(users, options['recipes']))
+        if options['tags'] and options['tags_per_recipe']:
+            recipes = Recipe.objects.filter(user_id__in=users)\
+                .order_by('id').values_list('id', 'user_id').iterator()
+            self._load(Recipe.tags.through, LINK_FIELDS, self._link_rows(
+                recipes, tags, options['tags_per_recipe']))
+
+        # Keys stay random, the seed only shapes the data
+        tokens = [(email, Token.generate_key()) for email in emails]
+        self._load(Token, TOKEN_FIELDS, (
+            (key, user_ids[email], self.now) for email, key in tokens
+        ))
+
+        # COPY skips signals, so build the search index in one statement
+        if full_text_available():
+            Recipe.objects.filter(user_id__in=users)\
+                .update(search_vector=search_document())
+        if connection.vendor == 'postgresql':
+            quote = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                for model in (user_model, Tag, Recipe, Recipe.tags.through):
+                    cursor.execute(f'ANALYZE {quote(model._meta.db_table)}')
+        return tokens
+
+    def _load(self, model, fields, rows):
+        start = time.perf_counter()
+        loaded = benchmark.copy_rows(model, fields, rows, self.batch_size)
+        elapsed = time.perf_counter() - start
+        rate = loaded / elapsed if elapsed else 0.0
+        self.stderr.write(f'{model._meta.db_table}: {loaded} rows in'
+                          f' {elapsed:.2f}s ({rate:.0f} rows/s)')
+
+    def _tag_rows(self, users, count):
+        for user_id in users:
+            for index in range(count):
+                name = f'{self.rng.choice(benchmark.WORDS)} {index}'
+                yield user_id, name, self.now
+
+    def _recipe_rows(self, users, count):
+        rng, words = self.rng, benchmark.WORDS
+        for user_id in users:
+            for index in range(count):
+                yield (
+                    user_id,
+                    f'{rng.choice(words)} {rng.choice(words)}',
+                    f'Recipe {index} with {rng.choice(words)}',
+                    rng.randint(1, 180),
+                    Decimal(rng.randint(100, 5000)) / 100,
+                    '', '', '', self.now,
+                )
+
+    def _link_rows(self, recipes, tags, per_recipe):
+        for recipe_id, user_id in recipes:
+            choices = tags[user_id]
+            for tag_id in self.rng.sample(
+                    choices, min(per_recipe, len(choices))):
+                yield recipe_id, tag_id
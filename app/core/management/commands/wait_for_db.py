@@ -1,27 +1,102 @@
 """
 Django command to wait for database
 """
+import math
+import random
+import socket
 import time
+from contextlib import contextmanager
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
 from psycopg2 import OperationalError as psycopg2Error
 
 from django.db.utils import OperationalError
 
+# First backoff delay in seconds, doubled after every failed attempt
+INITIAL_DELAY = 0.005
+DEFAULT_PORT = 5432
+# Longest wait for one TCP probe in seconds
+PROBE_TIMEOUT = 1.0
+
+
+def probe_tcp(settings_dict, timeout):
+    """Open and close a TCP connection to the database server"""
+    host = settings_dict.get('HOST')
+    if not host or host.startswith('/'):
+        return
+    port = int(settings_dict.get('PORT') or DEFAULT_PORT)
+    socket.create_connection((host, port), timeout=timeout).close()
+
+
+@contextmanager
+def connect_timeout(connection, seconds):
+    """Stop libpq from blocking longer than ``seconds`` while connecting"""
+    if seconds is None or connection.vendor != 'postgresql':
+        yield
+        return
+    options = connection.settings_dict.setdefault('OPTIONS', {})
+    configured = options.get('connect_timeout')
+    # libpq takes whole seconds
+    options['connect_timeout'] = max(1, math.ceil(seconds))
+    if configured is not None:
+        options['connect_timeout'] = min(options['connect_timeout'],
+                                         int(configured))
+    try:
+        yield
+    finally:
+        if configured is None:
+            del options['connect_timeout']
+        else:
+            options['connect_timeout'] = configured
+
 
 class Command(BaseCommand):
-    """Django Test"""
+    """Wait until the database accepts connections"""
+    help = ('Wait for the database with a TCP probe and a system check,'
+            ' retrying with jittered exponential backoff')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=60.0,
+                            help='Give up after this many seconds,'
+                                 ' 0 waits forever')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Longest delay between attempts')
 
     def handle(self, *args, **options):
-        """Test function"""
+        """Retry until the checks pass or the timeout expires"""
         self.stdout.write("Waiting for database ....")
-        db_up = False
-        while db_up is False:
+        timeout = options['timeout']
+        start = time.monotonic()
+        deadline = start + timeout if timeout else None
+        connection = connections[DEFAULT_DB_ALIAS]
+        attempts = 0
+        error = None
+        while True:
+            remaining = deadline - time.monotonic() if deadline else None
+            if remaining is not None and remaining <= 0:
+                raise CommandError(
+                    f'Database unavailable after {timeout:g}s'
+                    f' ({attempts} attempts): {error}')
+            attempts += 1
             try:
-                self.check(databases=['default'])
-                db_up = True
-            except (psycopg2Error, OperationalError):
-                self.stdout.write("database is unavailable, waiting ...")
-                time.sleep(1)
+                probe_tcp(connection.settings_dict,
+                          min(remaining or PROBE_TIMEOUT, PROBE_TIMEOUT))
+                with connect_timeout(connection, remaining):
+                    self.check(databases=['default'])
+                break
+            except (OSError, psycopg2Error, OperationalError) as exc:
+                error = exc
+                delay = min(options['interval'],
+                            INITIAL_DELAY * 2 ** (attempts - 1))
+                delay = random.uniform(delay / 2, delay)
+                self.stdout.write(
+                    "database is unavailable, waiting"
+                    f" {delay * 1000:.0f} ms ...")
+                time.sleep(delay if deadline is None else
+                           max(0.0, min(delay, deadline - time.monotonic())))
 
-        self.stdout.write(self.style.SUCCESS("Database available !"))
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Database available ! ready in {elapsed:.3f}s"
+            f" after {attempts} attempts"))
@@ -0,0 +1,109 @@
+"""
+Middleware shared by the apis
+"""
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from core.db_router import allow_replica_reads
+from core.instrumentation import begin_request, end_request, record_request
+
+REPLICA_APPS = {'recipe'}
+
+
+class ReplicaReadMiddleware(MiddlewareMixin):
+    """
+    Let safe recipe api requests read from replicas.
+
+    Views turn this off again for users pinned to the primary, see
+    ``core.db_router.pin_to_primary``.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        allow_replica_reads(
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and request.resolver_match.app_name in REPLICA_APPS
+        )
+
+    def process_response(self, request, response):
+        allow_replica_reads(False)
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Time a sample of requests and report where the time went.
+
+    PERF_SAMPLE_RATE of the requests get a ``Server-Timing`` header, a
+    structured log line on ``core.performance`` and a place in the
+    histograms served at /api/internal/metrics/.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= settings.PERF_SAMPLE_RATE:
+            return self.get_response(request)
+
+        metrics, token = begin_request()
+        request._metrics = metrics
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.PERF_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        metrics, token = begin_request()
+        request._metrics = metrics
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self._finish(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, '_metrics', None)
+        if metrics is not None:
+            metrics.tag = view_tag(request, view_func)
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, '_metrics', None)
+        if metrics is not None:
+            metrics.render_started()
+            response.add_post_render_callback(metrics.render_finished)
+        return response
+
+    def _finish(self, request, response, metrics):
+        metrics.finish(response)
+        response['Server-Timing'] = metrics.server_timing()
+        record_request(request, response, metrics)
+        return response
+
+
+def view_tag(request, view_func):
+    """Name a view by its viewset basename and action"""
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        basename = view_func.initkwargs.get('basename', '')
+        action = actions.get(request.method.lower(), request.method.lower())
+        return f'{basename}.{action}'
+    view_class = getattr(view_func, 'cls', None) or \
+        getattr(view_func, 'view_class', None)
+    name = view_class.__name__ if view_class else view_func.__name__
+    return f'{name}.{request.method.lower()}'
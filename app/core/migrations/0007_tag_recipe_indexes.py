@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:33
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """Fold tags sharing a user and name into the oldest one"""
+    Tag = apps.get_model('core', 'Tag')
+    Recipe = apps.get_model('core', 'Recipe')
+    through = Recipe.tags.through
+    duplicates = Tag.objects.values('user_id', 'name')\
+        .annotate(total=Count('id'), keep=Min('id'))\
+        .filter(total__gt=1)
+    for duplicate in duplicates:
+        others = list(
+            Tag.objects.filter(user_id=duplicate['user_id'],
+                               name=duplicate['name'])
+            .exclude(id=duplicate['keep'])
+            .values_list('id', flat=True)
+        )
+        recipe_ids = set(
+            through.objects.filter(tag_id__in=others)
+            .values_list('recipe_id', flat=True)
+        )
+        through.objects.bulk_create(
+            [through(recipe_id=recipe_id, tag_id=duplicate['keep'])
+             for recipe_id in recipe_ids],
+            ignore_conflicts=True,
+        )
+        Tag.objects.filter(id__in=others).delete()
+
+    # The deletes leave deferred foreign key checks pending, and PostgreSQL
+    # refuses to ALTER a table with pending trigger events, which the
+    # constraint and index below do in the same transaction.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recipe_updated_at_tag_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-id'], name='recipe_user_id_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'updated_at'], name='recipe_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'updated_at'], name='tag_user_updated_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_name_per_user'),
+        ),
+        # The tag filter probes recipe_tags by tag first; covering both
+        # columns lets it read recipe ids without visiting the table.
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_tags_tag_recipe_idx'
+            ' ON core_recipe_tags (tag_id, recipe_id)',
+            'DROP INDEX core_recipe_tags_tag_recipe_idx',
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:36
+
+from django.conf import settings
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+POPULATE_SQL = """
+UPDATE core_recipe SET search_vector =
+    setweight(to_tsvector(%(config)s, coalesce(title, '')), 'A') ||
+    setweight(to_tsvector(%(config)s, coalesce(description, '')), 'B') ||
+    setweight(to_tsvector(%(config)s, coalesce((
+        SELECT string_agg(core_tag.name, ' ')
+        FROM core_tag
+        JOIN core_recipe_tags ON core_recipe_tags.tag_id = core_tag.id
+        WHERE core_recipe_tags.recipe_id = core_recipe.id
+    ), '')), 'C')
+"""
+
+
+def create_search_index(apps, schema_editor):
+    """Build the GIN index and fill existing vectors on Postgres only"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX recipe_search_vector_idx'
+        ' ON core_recipe USING gin (search_vector)'
+    )
+    schema_editor.execute(
+        POPULATE_SQL, {'config': settings.RECIPE_SEARCH_CONFIG})
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX recipe_search_vector_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_tag_recipe_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='recipe',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_index, drop_search_index),
+            ],
+        ),
+    ]
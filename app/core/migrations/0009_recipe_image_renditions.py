@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:38
+
+import core.models
+from django.db import migrations, models
+
+
+def mark_existing_images_pending(apps, schema_editor):
+    """Queue images uploaded before renditions existed"""
+    Recipe = apps.get_model('core', 'Recipe')
+    Recipe.objects.exclude(image='').exclude(image__isnull=True)\
+        .update(image_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_medium',
+            field=models.ImageField(blank=True, null=True, upload_to=core.models.recipe_image_file_path),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], max_length=16),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to=core.models.recipe_image_file_path),
+        ),
+        migrations.RunPython(mark_existing_images_pending, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:43
+
+import core.models
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_image_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(db_index=True, null=True, storage=core.storage.recipe_image_storage, upload_to=core.models.recipe_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image_medium',
+            field=models.ImageField(blank=True, db_index=True, null=True, storage=core.storage.recipe_image_storage, upload_to=core.models.recipe_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, db_index=True, null=True, storage=core.storage.recipe_image_storage, upload_to=core.models.recipe_image_file_path),
+        ),
+    ]
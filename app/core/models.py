@@ -1,6 +1,8 @@
 """
 User database models
 """
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -11,6 +13,8 @@ from django.conf import settings
 import os
 import uuid
 
+from core.storage import recipe_image_storage
+
 
 def recipe_image_file_path(instance, filename):
     ext = os.path.splitext(filename)[1]
@@ -54,6 +58,13 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 class Recipe(models.Model):
     """Recipe object"""
+
+    class ImageStatus(models.TextChoices):
+        NONE = '', 'No image'
+        PENDING = 'pending', 'Pending'
+        READY = 'ready', 'Ready'
+        FAILED = 'failed', 'Failed'
+
     user = models.ForeignKey(to=settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
@@ -62,7 +73,31 @@ class Recipe(models.Model):
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(null=True, upload_to=recipe_image_file_path,
+                              storage=recipe_image_storage, db_index=True)
+    image_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    image_status = models.CharField(max_length=16, blank=True,
+                                    choices=ImageStatus.choices)
+    image_thumbnail = models.ImageField(null=True, blank=True,
+                                        upload_to=recipe_image_file_path,
+                                        storage=recipe_image_storage,
+                                        db_index=True)
+    image_medium = models.ImageField(null=True, blank=True,
+                                     upload_to=recipe_image_file_path,
+                                     storage=recipe_image_storage,
+                                     db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'],
+                         name='recipe_user_id_desc_idx'),
+            models.Index(fields=['user', 'updated_at'],
+                         name='recipe_user_updated_idx'),
+            GinIndex(fields=['search_vector'],
+                     name='recipe_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -73,6 +108,17 @@ class Tag(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(to=settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'],
+                                    name='unique_tag_name_per_user'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'updated_at'],
+                         name='tag_user_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
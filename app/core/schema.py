@@ -0,0 +1,127 @@
+"""
+Precomputed OpenAPI schema served with an ETag
+"""
+import hashlib
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import drf_spectacular
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from rest_framework.utils.encoders import JSONEncoder
+
+# Schema loaded or generated by this process and its renderings
+_state = {'fingerprint': None, 'schema': None, 'rendered': {}}
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint():
+    """Hash of the project sources and settings the schema derives from"""
+    digest = hashlib.sha256()
+    digest.update(drf_spectacular.__version__.encode())
+    digest.update(repr(sorted(settings.SPECTACULAR_SETTINGS.items()))
+                  .encode())
+    digest.update(repr(sorted(settings.REST_FRAMEWORK.items())).encode())
+    base = Path(settings.BASE_DIR)
+    for root, dirs, files in os.walk(base):
+        dirs[:] = sorted(name for name in dirs
+                         if name not in ('tests', '__pycache__'))
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = Path(root, name)
+                digest.update(str(path.relative_to(base)).encode())
+                digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def generate_schema():
+    """Introspect the api and return its OpenAPI schema"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(
+        urlconf=spectacular_settings.SERVE_URLCONF)
+    return generator.get_schema(request=None,
+                                public=spectacular_settings.SERVE_PUBLIC)
+
+
+def write_schema(path=None):
+    """Generate the schema and store it with the current fingerprint"""
+    path = Path(path or settings.SCHEMA_CACHE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {'fingerprint': code_fingerprint(),
+                'schema': generate_schema()}
+    temporary = path.with_suffix('.tmp')
+    with open(temporary, 'w') as schema_file:
+        json.dump(document, schema_file, cls=JSONEncoder)
+    os.replace(temporary, path)
+    return path
+
+
+def read_schema(path=None):
+    """Return the stored schema if it matches the current code"""
+    try:
+        with open(path or settings.SCHEMA_CACHE_PATH) as schema_file:
+            document = json.load(schema_file)
+    except (OSError, ValueError):
+        return None
+    if document.get('fingerprint') != code_fingerprint():
+        return None
+    return document['schema']
+
+
+def get_schema():
+    """
+    Return the schema and its fingerprint.
+
+    The stored file is read once per process; when it is missing or was
+    built from other code the schema is generated in memory instead.
+    """
+    fingerprint = code_fingerprint()
+    if _state['fingerprint'] != fingerprint:
+        schema = read_schema()
+        if schema is None:
+            # Round trip so both paths render the same plain types
+            schema = json.loads(json.dumps(generate_schema(),
+                                           cls=JSONEncoder))
+        _state.update(fingerprint=fingerprint, schema=schema, rendered={})
+    return _state['schema'], fingerprint
+
+
+def clear_schema():
+    _state.update(fingerprint=None, schema=None, rendered={})
+    code_fingerprint.cache_clear()
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """Serve the precomputed schema, rendered once per format"""
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        # Translated or versioned schemas are still generated per request
+        if request.GET:
+            return super().get(request, *args, **kwargs)
+
+        schema, fingerprint = get_schema()
+        renderer = request.accepted_renderer
+        media_type = renderer.media_type
+        etag = '"{}"'.format(hashlib.sha256(
+            f'{fingerprint}:{media_type}'.encode()).hexdigest()[:32])
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            content = _state['rendered'].get(media_type)
+            if content is None:
+                content = renderer.render(schema, media_type,
+                                          self.get_renderer_context())
+                _state['rendered'][media_type] = content
+            if renderer.charset:
+                media_type = f'{media_type}; charset={renderer.charset}'
+            response = HttpResponse(content, content_type=media_type)
+            response['Content-Disposition'] = \
+                f'inline; filename="{self._get_filename(request, None)}"'
+        response['ETag'] = etag
+        response['Vary'] = 'Accept'
+        return response
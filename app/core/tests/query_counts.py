@@ -0,0 +1,105 @@
+"""
+Query count baselines for api tests
+"""
+import json
+import os
+import re
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BASELINE_PATH = Path(__file__).with_name('query_baselines.json')
+# Set to record the current counts instead of asserting them
+UPDATE_ENV = 'UPDATE_QUERY_BASELINES'
+
+# Quoted strings, numbers and generated savepoint names
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\"s\d+_x\d+\"")
+
+
+def normalize_sql(sql):
+    """Replace literal values so statements compare across runs"""
+    return _LITERALS.sub('?', sql)
+
+
+def load_baselines():
+    if not BASELINE_PATH.exists():
+        return {}
+    with open(BASELINE_PATH) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baselines(recorded):
+    """Merge ``recorded`` into the baseline file, keyed by vendor"""
+    baselines = load_baselines()
+    baselines.setdefault(connection.vendor, {}).update(recorded)
+    with open(BASELINE_PATH, 'w') as baseline_file:
+        json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+
+class QueryCountMixin:
+    """
+    Assert the SQL run by api calls against checked-in baselines.
+
+    Baselines are stored per database vendor because backends differ in
+    the statements they need; a missing one fails the test. Run the tests
+    with ``UPDATE_QUERY_BASELINES=1`` to record the counts after an
+    intended change.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.updating = bool(os.environ.get(UPDATE_ENV))
+        cls.baselines = load_baselines().get(connection.vendor, {})
+        cls.recorded = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.updating and cls.recorded:
+            save_baselines(cls.recorded)
+        super().tearDownClass()
+
+    def capture(self, call):
+        """Return the result of ``call`` and the normalized SQL it ran"""
+        with CaptureQueriesContext(connection) as queries:
+            result = call()
+            if getattr(result, 'streaming', False):
+                b''.join(result.streaming_content)
+        return result, [normalize_sql(query['sql']) for query in queries]
+
+    def assertQueryBaseline(self, key, call):
+        """Fail when ``call`` runs more queries than recorded for ``key``"""
+        result, statements = self.capture(call)
+        if self.updating:
+            self.recorded[key] = {'count': len(statements),
+                                  'sql': statements}
+            return result
+
+        baseline = self.baselines.get(key)
+        if baseline is None:
+            self.fail(f'No {connection.vendor} query baseline for {key},'
+                      f' record one with {UPDATE_ENV}=1')
+        if len(statements) > baseline['count']:
+            self.fail(
+                f'{key} ran {len(statements)} queries, baseline is'
+                f' {baseline["count"]}:\n' + '\n'.join(statements)
+            )
+        return result
+
+    def assertQueriesConstant(self, key, setup, call, sizes=(1, 10)):
+        """
+        Fail when the queries of ``call`` grow with the number of rows.
+
+        ``setup(size)`` adds ``size`` rows before each measured call.
+        """
+        counts = {}
+        for size in sizes:
+            setup(size)
+            _, statements = self.capture(call)
+            counts[size] = len(statements)
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f'{key} queries scale with rows: {counts}',
+        )
@@ -0,0 +1,142 @@
+"""
+Tests for the load testing commands
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from core import benchmark
+from core.models import Recipe, Tag
+
+
+def result(p50=10.0, p99=20.0, queries=4.0):
+    return {'scenarios': {'list': {
+        'p50_ms': p50, 'p99_ms': p99, 'queries_per_request': queries,
+    }}}
+
+
+class BenchSuiteCompareTests(TestCase):
+
+    def _compare(self, baseline, current, *args):
+        paths = []
+        for data in (baseline, current):
+            handle, path = tempfile.mkstemp(suffix='.json')
+            with os.fdopen(handle, 'w') as output:
+                json.dump(data, output)
+            paths.append(path)
+            self.addCleanup(os.remove, path)
+        out = StringIO()
+        call_command('bench_suite', '--compare', *paths, *args, stdout=out)
+        return out.getvalue()
+
+    def test_within_threshold_passes(self):
+        """Test small latency changes are not regressions"""
+        out = self._compare(result(), result(p50=11.0))
+
+        self.assertIn('No regressions', out)
+
+    def test_slower_run_flagged(self):
+        """Test latency beyond the threshold fails the comparison"""
+        with self.assertRaisesMessage(CommandError, 'list.p99_ms'):
+            self._compare(result(), result(p99=30.0), '--threshold', '0.2')
+
+    def test_extra_queries_flagged(self):
+        """Test any increase in queries per request is a regression"""
+        with self.assertRaisesMessage(CommandError,
+                                      'list.queries_per_request'):
+            self._compare(result(), result(queries=5.0))
+
+
+class CountQueriesTests(TestCase):
+
+    def test_counts_past_debug_log_cap(self):
+        """Test counting is not capped like connection.queries_log"""
+        cap = connection.queries_log.maxlen
+        with benchmark.count_queries() as queries:
+            with connection.cursor() as cursor:
+                for _ in range(cap + 1):
+                    cursor.execute('SELECT 1')
+
+        self.assertEqual(queries.count, cap + 1)
+
+
+class SeedDataTests(TestCase):
+
+    def test_seeds_requested_scale(self):
+        """Test users, recipes and tags are created at the given scale"""
+        call_command('seed_data', '--users', '2', '--recipes', '5',
+                     '--tags', '3', stdout=StringIO(), stderr=StringIO())
+
+        users = get_user_model().objects.filter(email__startswith='seed-')
+        self.assertEqual(users.count(), 2)
+        self.assertEqual(Recipe.objects.filter(user__in=users).count(), 10)
+        self.assertEqual(Tag.objects.filter(user__in=users).count(), 6)
+
+    def test_shares_one_password_hash(self):
+        """Test seeded users share a single hash of the password"""
+        call_command('seed_data', '--users', '3', '--recipes', '1',
+                     '--tags', '1', '--password', 'pass-123',
+                     stdout=StringIO(), stderr=StringIO())
+
+        users = get_user_model().objects.filter(email__startswith='seed-')
+        self.assertEqual(
+            len(set(users.values_list('password', flat=True))), 1)
+        self.assertTrue(users.first().check_password('pass-123'))
+
+    def test_seed_is_deterministic(self):
+        """Test the same seed produces the same titles and tag links"""
+        def snapshot():
+            call_command('seed_data', '--recipes', '20', '--tags', '5',
+                         '--seed', '7', '--flush',
+                         stdout=StringIO(), stderr=StringIO())
+            recipes = Recipe.objects.filter(user__email='seed-0@example.com')
+            return [
+                (recipe.title, recipe.price,
+                 sorted(recipe.tags.values_list('name', flat=True)))
+                for recipe in recipes.order_by('id')
+            ]
+
+        first = snapshot()
+        self.assertEqual(len(first), 20)
+        self.assertTrue(all(len(tags) == 3 for _, _, tags in first))
+        self.assertEqual(snapshot(), first)
+
+    def test_rerun_without_flush_adds_users(self):
+        """Test seeding again continues after the existing seed users"""
+        for _ in range(2):
+            call_command('seed_data', '--users', '2', '--recipes', '1',
+                         '--tags', '1', stdout=StringIO(), stderr=StringIO())
+
+        emails = get_user_model().objects.filter(email__startswith='seed-')\
+            .order_by('id').values_list('email', flat=True)
+        self.assertEqual(list(emails),
+                         [f'seed-{index}@example.com' for index in range(4)])
+        self.assertEqual(Token.objects.filter(user__email__in=emails).count(),
+                         4)
+
+    def test_token_keys_not_seeded(self):
+        """Test token keys stay unpredictable whatever the seed"""
+        keys = []
+        for _ in range(2):
+            call_command('seed_data', '--recipes', '0', '--tags', '0',
+                         '--seed', '7', '--flush',
+                         stdout=StringIO(), stderr=StringIO())
+            keys.append(Token.objects.get(user__email='seed-0@example.com')
+                        .key)
+
+        self.assertNotEqual(keys[0], keys[1])
+        self.assertEqual(len(keys[0]), 40)
+
+    def test_copy_value_escapes_text_format(self):
+        """Test COPY values escape separators and encode nulls"""
+        self.assertEqual(benchmark._copy_value(None), '\\N')
+        self.assertEqual(benchmark._copy_value(True), 't')
+        self.assertEqual(benchmark._copy_value('a\tb\nc\\'),
+                         'a\\tb\\nc\\\\')
@@ -1,15 +1,20 @@
 """
 Test custom Django management command
 """
-
-from unittest.mock import patch
+import socket
+import time
+from io import StringIO
+from unittest.mock import MagicMock, patch
 
 from psycopg2 import OperationalError as psycopg2Error
 
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
+from django.db import connections
 from django.db.utils import OperationalError
 from django.test import SimpleTestCase
 
+from core.management.commands.wait_for_db import connect_timeout
+
 
 @patch("core.management.commands.wait_for_db.Command.check")
 class CommandTest(SimpleTestCase):
@@ -32,3 +37,79 @@ class CommandTest(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+    @patch("random.uniform", side_effect=lambda low, high: high)
+    @patch("time.sleep")
+    def test_wait_for_db_backoff(self, patched_sleep, patched_uniform,
+                                 patched_check):
+        """Test delays double from a few ms and are capped by interval"""
+        patched_check.side_effect = [OperationalError] * 5 + [True]
+
+        call_command('wait_for_db', '--interval', '0.02', stdout=StringIO())
+
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertEqual(delays, [0.005, 0.01, 0.02, 0.02, 0.02])
+
+    def test_wait_for_db_timeout(self, patched_check):
+        """Test an unavailable database fails once the timeout expires"""
+        patched_check.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', '--timeout', '0.05',
+                         stdout=StringIO())
+
+    @patch("socket.create_connection")
+    def test_wait_for_db_tcp_probe(self, patched_connect, patched_check):
+        """Test the full check runs only once the port accepts"""
+        patched_connect.side_effect = [ConnectionRefusedError] * 2 + \
+            [MagicMock()]
+        settings_dict = connections['default'].settings_dict
+
+        with patch.dict(settings_dict, {'HOST': 'db', 'PORT': ''}), \
+                patch("time.sleep"):
+            out = StringIO()
+            call_command('wait_for_db', stdout=out)
+
+        self.assertEqual(patched_connect.call_count, 3)
+        self.assertEqual(patched_connect.call_args.args[0], ('db', 5432))
+        patched_check.assert_called_once_with(databases=['default'])
+        self.assertIn('after 3 attempts', out.getvalue())
+
+    @patch("socket.create_connection")
+    def test_wait_for_db_skips_probe_without_host(self, patched_connect,
+                                                  patched_check):
+        """Test local socket connections skip the TCP probe"""
+        settings_dict = connections['default'].settings_dict
+
+        with patch.dict(settings_dict, {'HOST': ''}):
+            call_command('wait_for_db', stdout=StringIO())
+
+        patched_connect.assert_not_called()
+        patched_check.assert_called_once_with(databases=['default'])
+
+    def test_wait_for_db_timeout_refused_port(self, patched_check):
+        """Test a closed port fails with CommandError once time runs out"""
+        with socket.socket() as listener:
+            listener.bind(('127.0.0.1', 0))
+            port = listener.getsockname()[1]
+        settings_dict = connections['default'].settings_dict
+
+        start = time.monotonic()
+        with patch.dict(settings_dict, {'HOST': '127.0.0.1', 'PORT': port}):
+            with self.assertRaisesMessage(CommandError, 'after 0.3s'):
+                call_command('wait_for_db', '--timeout', '0.3',
+                             stdout=StringIO())
+
+        self.assertLess(time.monotonic() - start, 2)
+        patched_check.assert_not_called()
+
+    def test_connect_timeout_bounds_check(self, patched_check):
+        """Test the check connects with the remaining time as timeout"""
+        connection = MagicMock(vendor='postgresql',
+                               settings_dict={'OPTIONS': {}})
+
+        with connect_timeout(connection, 2.5):
+            self.assertEqual(
+                connection.settings_dict['OPTIONS']['connect_timeout'], 3)
+
+        self.assertEqual(connection.settings_dict['OPTIONS'], {})
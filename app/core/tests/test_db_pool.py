@@ -0,0 +1,219 @@
+"""
+Tests for the connection pool and its statistics endpoint
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from psycopg2 import extensions
+from rest_framework.test import APIClient
+
+from core.db import pool as pool_module
+from core.db.pool import ConnectionPool, PoolTimeout, close_pool, get_pool
+
+DB_POOL_URL = reverse('core:db-pool')
+
+
+class DatabasePoolStatsTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_requires_staff(self):
+        """Test regular users cannot read pool statistics"""
+        user = get_user_model().objects.create_user('user@example.com')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @patch('core.views.pool_stats')
+    def test_returns_pool_stats(self, mock_stats):
+        """Test staff users get the stats of every pool"""
+        mock_stats.return_value = {'default': {'in_use': 1, 'idle': 2}}
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testpass123')
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, mock_stats.return_value)
+
+
+class FakeConnection:
+    """Stand-in for a psycopg2 connection tracking its transaction"""
+
+    def __init__(self, usable=True):
+        self.usable = usable
+        self.closed = 0
+        self.autocommit = False
+        self.info = SimpleNamespace(
+            transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+    def cursor(self):
+        cursor = MagicMock()
+        cursor.__enter__.return_value.execute.side_effect = self._execute
+        return cursor
+
+    def _execute(self, sql):
+        if not self.usable:
+            raise psycopg2.OperationalError('server closed the connection')
+        if not self.autocommit:
+            self.info.transaction_status = \
+                extensions.TRANSACTION_STATUS_INTRANS
+
+    def rollback(self):
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        connection = FakeConnection()
+        self.opened.append(connection)
+        return connection
+
+    def pool(self, **options):
+        options = {'min_size': 0, 'max_size': 3, 'timeout': 0.01,
+                   **options}
+        return ConnectionPool(self.connect, **options)
+
+    def test_release_reuses_connection(self):
+        """Test a returned connection is handed out again"""
+        pool = self.pool(min_size=1)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_keeps_idle_connections_up_to_max_size(self):
+        """Test connections above min_size stay open when returned"""
+        pool = self.pool(min_size=1)
+        connections = [pool.acquire() for _ in range(3)]
+        for connection in connections:
+            pool.release(connection)
+
+        self.assertEqual(pool.stats()['idle'], 3)
+        self.assertFalse(any(c.closed for c in connections))
+
+    def test_release_rolls_back_open_transaction(self):
+        """Test a connection left in a transaction is reset"""
+        pool = self.pool()
+        connection = pool.acquire()
+        connection.info.transaction_status = \
+            extensions.TRANSACTION_STATUS_INERROR
+        pool.release(connection)
+
+        self.assertEqual(connection.info.transaction_status,
+                         extensions.TRANSACTION_STATUS_IDLE)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_release_discards_closed_connection(self):
+        pool = self.pool()
+        connection = pool.acquire()
+        connection.closed = 1
+        pool.release(connection)
+
+        self.assertEqual(pool.stats()['idle'], 0)
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+    def test_health_check_leaves_no_transaction(self):
+        """Test the probe does not leave the connection in a transaction"""
+        pool = self.pool(min_size=1, health_checks=True)
+
+        connection = pool.acquire()
+
+        self.assertEqual(connection.info.transaction_status,
+                         extensions.TRANSACTION_STATUS_IDLE)
+
+    def test_health_check_replaces_broken_connection(self):
+        """Test an idle connection that fails the probe is discarded"""
+        pool = self.pool(min_size=1, health_checks=True)
+        self.opened[0].usable = False
+
+        connection = pool.acquire()
+
+        self.assertIsNot(connection, self.opened[0])
+        self.assertTrue(self.opened[0].closed)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    def test_exhausted_pool_times_out(self):
+        """Test callers beyond max_size fail after the timeout"""
+        pool = self.pool(max_size=1)
+        connection = pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+        pool.release(connection)
+        self.assertIs(pool.acquire(), connection)
+        stats = pool.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        connect = MagicMock(side_effect=psycopg2.OperationalError)
+        pool = ConnectionPool(connect, min_size=0, max_size=1, timeout=0.01)
+
+        for _ in range(2):
+            with self.assertRaises(psycopg2.OperationalError):
+                pool.acquire()
+
+        self.assertEqual(connect.call_count, 2)
+        self.assertEqual(pool.stats()['timeouts'], 0)
+
+    def test_close_discards_idle_and_returned_connections(self):
+        pool = self.pool()
+        idle, busy = pool.acquire(), pool.acquire()
+        pool.release(idle)
+
+        pool.close()
+        pool.release(busy)
+
+        self.assertTrue(idle.closed)
+        self.assertTrue(busy.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+
+@patch.dict(pool_module._pools, clear=True)
+@patch('core.db.pool.psycopg2.connect',
+       side_effect=lambda **params: FakeConnection())
+class GetPoolTests(SimpleTestCase):
+
+    def test_reuses_pool_of_alias(self, mock_connect):
+        first = get_pool('default', {}, {'dbname': 'app'})
+
+        self.assertIs(get_pool('default', {}, {'dbname': 'app'}), first)
+
+    def test_replaces_pool_when_parameters_change(self, mock_connect):
+        """Test switching to another database does not reuse connections"""
+        first = get_pool('default', {}, {'dbname': 'app'})
+        idle = first.acquire()
+        first.release(idle)
+
+        second = get_pool('default', {}, {'dbname': 'test_app'})
+
+        self.assertIsNot(second, first)
+        self.assertTrue(idle.closed)
+        mock_connect.assert_called_with(dbname='test_app')
+
+    def test_close_pool(self, mock_connect):
+        pool = get_pool('default', {}, {'dbname': 'app'})
+
+        close_pool('default')
+
+        self.assertTrue(pool.closed)
+        self.assertNotIn('default', pool_module._pools)
@@ -0,0 +1,141 @@
+"""
+Tests for replica read routing
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.checks import check_replica_pin_cache
+from core.db_router import ReplicaRouter, replica_reads
+from core.models import Recipe
+from recipe.cache import get_cache, invalidate_user
+
+RECIPES_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRouterTests(TransactionTestCase):
+    """Test the router decisions outside test transactions"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_allowed_reads_use_replica(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica_1')
+
+    def test_other_models_stay_on_primary(self):
+        with replica_reads():
+            self.assertIsNone(self.router.db_for_read(Token))
+
+    def test_transactions_stay_on_primary(self):
+        with replica_reads(), transaction.atomic():
+            self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_writes_and_migrations_use_primary(self):
+        self.assertEqual(self.router.db_for_write(Recipe), 'default')
+        self.assertFalse(self.router.allow_migrate('replica_1', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+@patch('core.db_router.choose_replica', return_value='default')
+class ReplicaMiddlewareTests(TransactionTestCase):
+    """Test which requests may read from a replica"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('user@example.com')
+        Recipe.objects.create(user=self.user, title='Soup',
+                              time_minutes=5, price=Decimal('1.00'))
+        # Creating the recipe pinned the user
+        get_cache().clear()
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_recipe_reads_use_replica(self, mock_choose):
+        self.client.get(RECIPES_URL)
+
+        mock_choose.assert_called()
+
+    def test_other_apis_use_primary(self, mock_choose):
+        self.client.get(ME_URL)
+
+        mock_choose.assert_not_called()
+
+    def test_client_pinned_after_write(self, mock_choose):
+        payload = {'title': 'Pie', 'time_minutes': 5, 'price': '2.00'}
+        self.client.post(RECIPES_URL, payload)
+
+        self.client.get(RECIPES_URL)
+
+        mock_choose.assert_not_called()
+
+    def test_pin_follows_user_across_tokens(self, mock_choose):
+        """Test the pin applies to the user, not the credentials used"""
+        payload = {'title': 'Pie', 'time_minutes': 5, 'price': '2.00'}
+        self.client.post(RECIPES_URL, payload)
+        Token.objects.filter(user=self.user).delete()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.client.get(RECIPES_URL)
+
+        mock_choose.assert_not_called()
+
+    def test_background_write_pins_user(self, mock_choose):
+        """Test writes outside a request, like image jobs, pin the user"""
+        invalidate_user(self.user.id)
+
+        self.client.get(RECIPES_URL)
+
+        mock_choose.assert_not_called()
+
+    def test_other_clients_not_pinned(self, mock_choose):
+        payload = {'title': 'Pie', 'time_minutes': 5, 'price': '2.00'}
+        self.client.post(RECIPES_URL, payload)
+        other = get_user_model().objects.create_user('other@example.com')
+        token = Token.objects.create(user=other)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.client.get(RECIPES_URL)
+
+        mock_choose.assert_called()
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], TESTING=False)
+class ReplicaPinCacheCheckTests(SimpleTestCase):
+    """Test replicas are refused without a shared pin cache"""
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_local_cache_is_an_error(self):
+        errors = check_replica_pin_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/0',
+    }})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_replica_pin_cache(None), [])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_passes(self):
+        self.assertEqual(check_replica_pin_cache(None), [])
@@ -0,0 +1,121 @@
+"""
+Tests for request instrumentation
+"""
+import json
+import logging
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.instrumentation import (
+    Histogram,
+    begin_request,
+    end_request,
+    reset_histograms,
+)
+from core.models import Recipe
+from recipe.cache import get_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('core:metrics')
+
+
+@override_settings(PERF_SAMPLE_RATE=1.0)
+class PerformanceMiddlewareTests(TestCase):
+    """Test sampled requests are timed"""
+
+    def setUp(self):
+        handlers = patch.object(logging.getLogger('core.performance'),
+                                'handlers', [logging.NullHandler()])
+        handlers.start()
+        self.addCleanup(handlers.stop)
+        get_cache().clear()
+        reset_histograms()
+        self.user = get_user_model().objects.create_user('user@example.com')
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5,
+            price=Decimal('1.00'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        """Test sampled responses report their timings"""
+        res = self.client.get(RECIPES_URL)
+
+        timing = res['Server-Timing']
+        for name in ('db', 'serialize', 'render', 'total'):
+            self.assertIn(f'{name};dur=', timing)
+        self.assertRegex(timing, r'desc="[1-9]\d* queries"')
+
+    def test_structured_log_tagged_by_action(self):
+        """Test each sampled request logs a JSON record"""
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+        with self.assertLogs('core.performance', level='INFO') as logs:
+            res = self.client.patch(url, {'title': 'Stew'})
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['tag'], 'recipe.partial_update')
+        self.assertEqual(record['status'], status.HTTP_200_OK)
+        self.assertEqual(record['bytes'], len(res.content))
+        self.assertGreater(record['queries'], 0)
+
+    @override_settings(PERF_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_untouched(self):
+        """Test requests outside the sample get no header"""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    def test_metrics_endpoint(self):
+        """Test staff can read the aggregated histograms"""
+        self.client.get(RECIPES_URL)
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testpass123')
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe.list']['total']['count'], 1)
+
+    def test_metrics_endpoint_requires_staff(self):
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class QueryTimingTests(TestCase):
+
+    def test_counts_queries_in_worker_threads(self):
+        """Test queries run through sync_to_async, as under ASGI, count"""
+        async def request():
+            metrics, token = begin_request()
+            try:
+                await sync_to_async(Recipe.objects.count,
+                                    thread_sensitive=False)()
+            finally:
+                end_request(token)
+            return metrics
+
+        metrics = async_to_sync(request)()
+
+        self.assertEqual(metrics.queries, 1)
+        self.assertGreater(metrics.timings['db'], 0)
+
+
+class HistogramTests(TestCase):
+
+    def test_quantiles(self):
+        histogram = Histogram()
+        for value in [0.5] * 90 + [30] * 9 + [9000]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.quantile(0.5), 1)
+        self.assertEqual(histogram.quantile(0.99), 50)
+        self.assertEqual(histogram.quantile(1.0), '+Inf')
@@ -0,0 +1,213 @@
+"""
+Query count guards for the recipe, tag and user apis
+"""
+from decimal import Decimal
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.tests.query_counts import QueryCountMixin
+
+RECIPES_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+BULK_CREATE_URL = reverse('recipe:recipe-bulk-create')
+TAGS_URL = reverse('recipe:tag-list')
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+
+
+def recipe_detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def tag_detail_url(tag_id):
+    return reverse('recipe:tag-detail', args=[tag_id])
+
+
+def recipe_payload(title='Query recipe', **params):
+    return {'title': title, 'time_minutes': 10, 'price': '5.00', **params}
+
+
+@tag('queries')
+@override_settings(RECIPE_CACHE_TIMEOUT=0)
+class QueryCountTests(QueryCountMixin, TestCase):
+    """Endpoints must not run more queries than their baseline"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='queries@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.serial = count()
+
+    def _recipe(self, tags=0):
+        recipe = Recipe.objects.create(
+            user=self.user, title=f'Recipe {next(self.serial)}',
+            time_minutes=5, price=Decimal('5.00'))
+        recipe.tags.add(*(self._tag() for _ in range(tags)))
+        return recipe
+
+    def _tag(self):
+        return Tag.objects.create(user=self.user,
+                                  name=f'Tag {next(self.serial)}')
+
+    def _recipes(self, size):
+        for _ in range(size):
+            self._recipe(tags=2)
+
+    def test_recipe_list(self):
+        self._recipes(3)
+        self.assertQueryBaseline(
+            'recipe.list', lambda: self.client.get(RECIPES_URL))
+
+    def test_recipe_list_filter_tags(self):
+        recipe = self._recipe(tags=2)
+        tag_ids = ','.join(str(tag.id) for tag in recipe.tags.all())
+        self.assertQueryBaseline('recipe.list_filter_tags', lambda: (
+            self.client.get(RECIPES_URL, {'tags': tag_ids})))
+
+    def test_recipe_retrieve(self):
+        recipe = self._recipe(tags=2)
+        self.assertQueryBaseline('recipe.retrieve', lambda: (
+            self.client.get(recipe_detail_url(recipe.id))))
+
+    def test_recipe_create(self):
+        self.assertQueryBaseline('recipe.create', lambda: self.client.post(
+            RECIPES_URL, recipe_payload(), format='json'))
+
+    def test_recipe_create_with_tags(self):
+        payload = recipe_payload(tags=[{'name': 'Vegan'}, {'name': 'Quick'}])
+        self.assertQueryBaseline('recipe.create_with_tags', lambda: (
+            self.client.post(RECIPES_URL, payload, format='json')))
+
+    def test_recipe_partial_update_tags(self):
+        recipe = self._recipe(tags=1)
+        payload = {'title': 'Renamed', 'tags': [{'name': 'Dinner'}]}
+        self.assertQueryBaseline('recipe.partial_update', lambda: (
+            self.client.patch(recipe_detail_url(recipe.id), payload,
+                              format='json')))
+
+    def test_recipe_destroy(self):
+        recipe = self._recipe(tags=2)
+        self.assertQueryBaseline('recipe.destroy', lambda: (
+            self.client.delete(recipe_detail_url(recipe.id))))
+
+    def test_recipe_bulk_create(self):
+        payload = [recipe_payload(f'Bulk {i}', tags=[{'name': 'Batch'}])
+                   for i in range(3)]
+        self.assertQueryBaseline('recipe.bulk_create', lambda: (
+            self.client.post(BULK_CREATE_URL, payload, format='json')))
+
+    def test_recipe_export(self):
+        self._recipes(3)
+        self.assertQueryBaseline(
+            'recipe.export', lambda: self.client.get(EXPORT_URL))
+
+    def test_tag_list(self):
+        self._tag()
+        self.assertQueryBaseline(
+            'tag.list', lambda: self.client.get(TAGS_URL))
+
+    def test_tag_partial_update(self):
+        tag_id = self._tag().id
+        self.assertQueryBaseline('tag.partial_update', lambda: (
+            self.client.patch(tag_detail_url(tag_id), {'name': 'Renamed'})))
+
+    def test_tag_destroy(self):
+        tag_id = self._tag().id
+        self.assertQueryBaseline('tag.destroy', lambda: (
+            self.client.delete(tag_detail_url(tag_id))))
+
+    def test_user_create(self):
+        payload = {'email': 'new@example.com', 'password': 'testpass123',
+                   'name': 'New'}
+        self.assertQueryBaseline('user.create', lambda: (
+            APIClient().post(CREATE_USER_URL, payload)))
+
+    def test_user_token(self):
+        payload = {'email': self.user.email, 'password': 'testpass123'}
+        self.assertQueryBaseline('user.token', lambda: (
+            APIClient().post(TOKEN_URL, payload)))
+
+    def test_user_me(self):
+        client = APIClient()
+        token = Token.objects.create(user=self.user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertQueryBaseline('user.me', lambda: client.get(ME_URL))
+
+    def test_user_me_partial_update(self):
+        self.assertQueryBaseline('user.me_partial_update', lambda: (
+            self.client.patch(ME_URL, {'name': 'Renamed'})))
+
+
+@tag('queries')
+@override_settings(RECIPE_CACHE_TIMEOUT=0)
+class QueryScalingTests(QueryCountMixin, TestCase):
+    """Endpoint queries must not grow with the number of rows"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='scaling@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.serial = count()
+
+    def _tags(self, size):
+        return [Tag.objects.create(user=self.user,
+                                   name=f'Tag {next(self.serial)}')
+                for _ in range(size)]
+
+    def _recipes(self, size):
+        for _ in range(size):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Recipe {next(self.serial)}',
+                time_minutes=5, price=Decimal('5.00'))
+            recipe.tags.add(*self._tags(2))
+
+    def test_recipe_list(self):
+        self.assertQueriesConstant('recipe.list', self._recipes,
+                                   lambda: self.client.get(RECIPES_URL))
+
+    def test_recipe_list_filter_tags(self):
+        tags = self._tags(2)
+        tag_ids = ','.join(str(tag.id) for tag in tags)
+
+        def add_tagged(size):
+            self._recipes(size)
+            for recipe in Recipe.objects.filter(user=self.user):
+                recipe.tags.add(*tags)
+
+        self.assertQueriesConstant(
+            'recipe.list_filter_tags', add_tagged,
+            lambda: self.client.get(RECIPES_URL, {'tags': tag_ids}))
+
+    def test_recipe_retrieve_tags(self):
+        recipe = Recipe.objects.create(user=self.user, title='Many tags',
+                                       time_minutes=5, price=Decimal('1'))
+        self.assertQueriesConstant(
+            'recipe.retrieve', lambda size: recipe.tags.add(*self._tags(size)),
+            lambda: self.client.get(recipe_detail_url(recipe.id)))
+
+    def test_recipe_export(self):
+        self.assertQueriesConstant('recipe.export', self._recipes,
+                                   lambda: self.client.get(EXPORT_URL))
+
+    def test_recipe_create_with_tags(self):
+        def create(size):
+            self.payload = recipe_payload(tags=[
+                {'name': f'New {next(self.serial)}'} for _ in range(size)])
+
+        self.assertQueriesConstant(
+            'recipe.create_with_tags', create,
+            lambda: self.client.post(RECIPES_URL, self.payload,
+                                     format='json'))
+
+    def test_tag_list(self):
+        self.assertQueriesConstant('tag.list', self._tags,
+                                   lambda: self.client.get(TAGS_URL))
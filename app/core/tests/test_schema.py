@@ -0,0 +1,102 @@
+"""
+Tests for the precomputed schema and startup commands
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import schema
+from core.management.commands.profile_imports import parse_importtime
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'openapi.json')
+        override = override_settings(SCHEMA_CACHE_PATH=self.path)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(schema.clear_schema)
+        schema.clear_schema()
+        self.client = APIClient()
+
+    def test_build_schema_writes_current_file(self):
+        """Test the command stores a schema the check accepts"""
+        call_command('build_schema', stdout=StringIO())
+
+        with open(self.path) as schema_file:
+            document = json.load(schema_file)
+        self.assertEqual(document['fingerprint'], schema.code_fingerprint())
+        self.assertIn('/api/recipe/recipes/', document['schema']['paths'])
+        call_command('build_schema', '--check', stdout=StringIO())
+
+    def test_build_schema_check_rejects_stale_file(self):
+        """Test a schema built from other code fails the check"""
+        with open(self.path, 'w') as schema_file:
+            json.dump({'fingerprint': 'old', 'schema': {}}, schema_file)
+
+        with self.assertRaises(CommandError):
+            call_command('build_schema', '--check', stdout=StringIO())
+
+    def test_view_serves_stored_schema(self):
+        """Test the view serves the stored schema without generating"""
+        call_command('build_schema', stdout=StringIO())
+
+        with patch('core.schema.generate_schema') as generate:
+            res = self.client.get(SCHEMA_URL,
+                                  HTTP_ACCEPT='application/vnd.oai.openapi'
+                                              '+json')
+
+        generate.assert_not_called()
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('/api/recipe/recipes/', res.json()['paths'])
+        self.assertTrue(res['ETag'])
+
+    def test_view_generates_when_stale(self):
+        """Test a missing file falls back to generating in memory"""
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(b'/api/recipe/recipes/', res.content)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_view_not_modified(self):
+        """Test a matching If-None-Match returns 304"""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+        other = self.client.get(
+            SCHEMA_URL, HTTP_ACCEPT='application/vnd.oai.openapi+json',
+            HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(other.status_code, 200)
+        self.assertNotEqual(other['ETag'], etag)
+
+
+class ProfileImportsTests(SimpleTestCase):
+
+    def test_parse_importtime(self):
+        """Test import time lines are parsed into self and cumulative us"""
+        output = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |   json.decoder',
+            'import time:       300 |        420 | json',
+            'unrelated line',
+        ])
+
+        self.assertEqual(list(parse_importtime(output)), [
+            ('json.decoder', 120, 120),
+            ('json', 300, 420),
+        ])
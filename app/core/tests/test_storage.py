@@ -0,0 +1,118 @@
+"""
+Tests for content addressed image storage
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Recipe
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings.enable()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def _recipe(self, content=b'image'):
+        recipe = Recipe.objects.create(
+            user=self.user, title='Sample', time_minutes=5,
+            price=Decimal('5.00'))
+        recipe.image.save('photo.JPG', ContentFile(content))
+        return recipe
+
+    def test_file_named_after_content(self):
+        """Test files are stored under a sharded content hash"""
+        digest = hashlib.sha256(b'image').hexdigest()
+        recipe = self._recipe()
+
+        self.assertEqual(
+            recipe.image.name,
+            f'uploads/recipe/{digest[:2]}/{digest[2:4]}/{digest}.jpg')
+        self.assertTrue(os.path.exists(recipe.image.path))
+
+    def test_identical_content_stored_once(self):
+        """Test identical uploads share a single file"""
+        first = self._recipe()
+        second = self._recipe()
+
+        self.assertEqual(first.image.name, second.image.name)
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_delete_leaves_file_to_gc(self):
+        """Test deleting a recipe keeps its file until a collection"""
+        recipe = self._recipe()
+        name = recipe.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+
+        self.assertTrue(recipe.image.storage.exists(name))
+
+    def test_reuse_refreshes_gc_grace_period(self):
+        """Test storing existing content again makes the file young"""
+        recipe = self._recipe()
+        path = recipe.image.path
+        os.utime(path, (0, 0))
+
+        self._recipe()
+
+        self.assertGreater(os.path.getmtime(path), 0)
+        out = StringIO()
+        Recipe.objects.update(image='')
+        call_command('gc_recipe_images', stdout=out)
+        self.assertTrue(os.path.exists(path))
+
+    def test_gc_removes_orphans(self):
+        """Test the gc command deletes only unreferenced files"""
+        kept = self._recipe(b'kept')
+        orphan = self._recipe(b'orphan')
+        orphan_name = orphan.image.name
+        Recipe.objects.filter(pk=orphan.pk).update(image='')
+
+        out = StringIO()
+        call_command('gc_recipe_images', '--min-age', '0', stdout=out)
+
+        storage = kept.image.storage
+        self.assertTrue(storage.exists(kept.image.name))
+        self.assertFalse(storage.exists(orphan_name))
+        self.assertIn('Removed 1 orphaned files', out.getvalue())
+
+    def test_gc_dry_run_and_min_age(self):
+        """Test recent files and dry runs leave the disk untouched"""
+        orphan = self._recipe(b'orphan')
+        Recipe.objects.filter(pk=orphan.pk).update(image='')
+
+        out = StringIO()
+        call_command('gc_recipe_images', stdout=out)
+        call_command('gc_recipe_images', '--min-age', '0', '--dry-run',
+                     stdout=out)
+
+        self.assertTrue(orphan.image.storage.exists(orphan.image.name))
+        self.assertIn('Would remove 1 orphaned files', out.getvalue())
+
+    def test_gc_reports_savings(self):
+        """Test the report counts bytes saved by sharing files"""
+        self._recipe(b'shared')
+        self._recipe(b'shared')
+
+        out = StringIO()
+        call_command('gc_recipe_images', '--dry-run', stdout=out)
+
+        self.assertIn('Saved by sharing:  6', out.getvalue())
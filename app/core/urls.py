@@ -0,0 +1,13 @@
+"""
+Url mapping for internal endpoints
+"""
+from django.urls import path
+
+from core import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('db-pool/', views.DatabasePoolStatsView.as_view(), name='db-pool'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
+]
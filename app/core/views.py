@@ -0,0 +1,32 @@
+"""
+Internal views for operating the service
+"""
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.db.pool import pool_stats
+from core.instrumentation import histogram_snapshot
+from user.authentication import CachedTokenAuthentication
+
+
+class DatabasePoolStatsView(APIView):
+    """Connection pool statistics of the worker serving the request"""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        return Response(pool_stats())
+
+
+class MetricsView(APIView):
+    """Request timing histograms of the worker serving the request"""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        return Response(histogram_snapshot())
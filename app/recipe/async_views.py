@@ -0,0 +1,168 @@
+"""
+Async read path for recipe apis when served over ASGI
+"""
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import URLPattern
+from rest_framework.renderers import JSONRenderer
+
+from core.db_router import use_primary_if_pinned
+from core.instrumentation import timed
+from core.models import Recipe, Tag
+from recipe import serializer
+from recipe.cache import get_cache, record
+from user.authentication import aget_token_user
+
+CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+
+async def _attach_tags(recipes, links):
+    """Fill the tags prefetch cache of ``recipes`` from through rows"""
+    tags = defaultdict(list)
+    async for link in links.select_related('tag').order_by('id'):
+        tags[link.recipe_id].append(link.tag)
+
+    for recipe in recipes:
+        queryset = recipe.tags.all()
+        queryset._result_cache = tags[recipe.id]
+        queryset._prefetch_done = True
+        recipe._prefetched_objects_cache = {'tags': queryset}
+
+
+def _tag_links():
+    return Recipe.tags.through.objects.only(
+        'recipe_id', 'tag__id', 'tag__name')
+
+
+async def list_recipes(view, request, user, **kwargs):
+    """Serialize every recipe of the user with the async ORM"""
+    queryset = Recipe.objects.filter(user=user).order_by('-id')\
+        .only(*view._serializer_columns())
+    recipes = [recipe async for recipe in queryset]
+    await _attach_tags(recipes, _tag_links().filter(recipe__user=user))
+    with timed('serialize'):
+        return serializer.RecipeSerializer(
+            recipes, many=True, context={'request': request}).data
+
+
+async def retrieve_recipe(view, request, user, pk, **kwargs):
+    """Serialize one recipe of the user with the async ORM"""
+    recipe = await Recipe.objects.filter(user=user, pk=pk)\
+        .only(*view._serializer_columns()).afirst()
+    if recipe is None:
+        return None
+    await _attach_tags([recipe], _tag_links().filter(recipe_id=recipe.id))
+    with timed('serialize'):
+        return serializer.RecipeDetailSerializer(
+            recipe, context={'request': request}).data
+
+
+async def list_tags(view, request, user, **kwargs):
+    """Serialize every tag of the user with the async ORM"""
+    tags = [tag async for tag in
+            Tag.objects.filter(user=user).order_by('-name')]
+    with timed('serialize'):
+        return serializer.TagSerializer(tags, many=True).data
+
+
+READERS = {
+    'recipe-list': ('list', list_recipes),
+    'recipe-detail': ('retrieve', retrieve_recipe),
+    'tag-list': ('list', list_tags),
+}
+
+
+def _token_key(request):
+    """Return the key of a ``Token`` authorization header"""
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) == 2 and parts[0].lower() == 'token':
+        return parts[1]
+    return None
+
+
+def _is_plain_read(request, kwargs):
+    """Whether the async path can answer the request on its own"""
+    return (
+        request.method == 'GET'
+        and not request.GET
+        and 'format' not in kwargs
+        and 'text/html' not in request.headers.get('Accept', '')
+        and not any(header in request.headers
+                    for header in CONDITIONAL_HEADERS)
+    )
+
+
+def _lookup(view, request, kwargs):
+    """Read the version and cached payload of a request in one hop"""
+    use_primary_if_pinned(request.user.id)
+    version = view.get_version(request, **kwargs)
+    key = view._response_cache_key('response', request, **kwargs)
+    data = get_cache().get(key)
+    record('hits' if data is not None else 'misses')
+    return version, key, data
+
+
+def async_read_view(drf_view, name):
+    """
+    Wrap a router view so plain GETs run on the async ORM.
+
+    Writes, uploads, filtered or paginated lists, conditional requests
+    and failed authentication go to the DRF view in a worker thread.
+    Responses share the DRF view's cache entries and validators.
+    """
+    action, reader = READERS[name]
+    viewset_class = drf_view.cls
+    basename = name.rsplit('-', 1)[0]
+    delegate = sync_to_async(drf_view)
+
+    async def view(request, *args, **kwargs):
+        if not _is_plain_read(request, kwargs):
+            return await delegate(request, *args, **kwargs)
+        key = _token_key(request)
+        user = await aget_token_user(key) if key else None
+        if user is None:
+            return await delegate(request, *args, **kwargs)
+
+        request.user = user
+        viewset = viewset_class(request=request, action=action,
+                                basename=basename, kwargs=kwargs,
+                                format_kwarg=None)
+        version, cache_key, data = await sync_to_async(_lookup)(
+            viewset, request, kwargs)
+        if version is None:
+            return await delegate(request, *args, **kwargs)
+
+        cache_status = 'HIT'
+        if data is None:
+            data = await reader(viewset, request, user, **kwargs)
+            if data is None:
+                return await delegate(request, *args, **kwargs)
+            await get_cache().aset(cache_key, data,
+                                   settings.RECIPE_CACHE_TIMEOUT)
+            cache_status = 'MISS'
+
+        with timed('render'):
+            content = JSONRenderer().render(data)
+        response = HttpResponse(content, content_type='application/json')
+        response['Vary'] = 'Accept'
+        response['X-Cache'] = cache_status
+        response['ETag'] = version
+        return response
+
+    view.__dict__.update(drf_view.__dict__)
+    del view.__wrapped__
+    view.csrf_exempt = True
+    return view
+
+
+def async_read_patterns(urls):
+    """Return router ``urls`` with the read routes served asynchronously"""
+    return [
+        URLPattern(url.pattern, async_read_view(url.callback, url.name),
+                   url.default_args, url.name)
+        if url.name in READERS else url
+        for url in urls
+    ]
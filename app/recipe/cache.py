@@ -0,0 +1,137 @@
+"""
+Per-user response cache for recipe apis
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.db_router import pin_to_primary
+
+GENERATION_KEY = 'recipe:generation:{user_id}'
+RESPONSE_KEY = 'recipe:{name}:{user_id}:{generation}:{digest}'
+STATS_KEY = 'recipe:stats:{name}'
+
+
+def get_cache():
+    """Return the cache backend used for api responses"""
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def _incr(cache, key, timeout=None):
+    """Increment a counter, creating it when it is missing"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=timeout)
+        return cache.incr(key)
+
+
+def get_generation(user_id):
+    """Return the current cache generation of the user"""
+    cache = get_cache()
+    key = GENERATION_KEY.format(user_id=user_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Start from the clock so a generation that was evicted never
+        # comes back with a value that older entries were stored under.
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(user_id):
+    """Invalidate every cached response of the user"""
+    cache = get_cache()
+    key = GENERATION_KEY.format(user_id=user_id)
+    if cache.get(key) is None:
+        cache.add(key, time.time_ns(), timeout=None)
+    _incr(cache, key)
+
+
+def expire_user(user_id):
+    """
+    Start a new cache generation and read it from the primary.
+
+    The pin keeps a lagging replica from filling the new generation with
+    data from before the write.
+    """
+    bump_generation(user_id)
+    pin_to_primary(user_id)
+
+
+def invalidate_user(user_id):
+    """Drop cached responses now and again once the write commits"""
+    expire_user(user_id)
+    transaction.on_commit(lambda: expire_user(user_id))
+
+
+def record(name):
+    """Count a cache hit or miss"""
+    _incr(get_cache(), STATS_KEY.format(name=name))
+
+
+def cache_stats():
+    """Return the hit and miss counters"""
+    cache = get_cache()
+    names = ('hits', 'misses')
+    values = cache.get_many([STATS_KEY.format(name=name) for name in names])
+    stats = {
+        name: values.get(STATS_KEY.format(name=name), 0) for name in names
+    }
+    total = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / total if total else 0.0
+    return stats
+
+
+class CachedResponseMixin:
+    """Serve read actions from a cache keyed by user, action and query"""
+
+    def _response_cache_key(self, name, request, *args, **kwargs):
+        """Build the cache key of a value derived from the request"""
+        user_id = request.user.id
+        parts = [
+            self.basename,
+            self.action,
+            request.get_host(),
+            request.get_full_path(),
+            str(sorted(kwargs.items())),
+        ]
+        digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+        return RESPONSE_KEY.format(
+            name=name,
+            user_id=user_id,
+            generation=get_generation(user_id),
+            digest=digest,
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Return a cached response or build one with ``handler``"""
+        cache = get_cache()
+        key = self._response_cache_key('response', request, *args, **kwargs)
+        data = cache.get(key)
+        if data is not None:
+            record('hits')
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        record('misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def cached_value(self, name, compute, request, *args, **kwargs):
+        """Return a per-request value from the cache or ``compute()``"""
+        cache = get_cache()
+        key = self._response_cache_key(name, request, *args, **kwargs)
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                cache.set(key, value, settings.RECIPE_CACHE_TIMEOUT)
+        return value
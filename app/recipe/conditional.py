@@ -0,0 +1,51 @@
+"""
+Conditional GET support for recipe apis
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+
+
+def version_of(queryset, updated_field='updated_at', count_field='id'):
+    """Return the row count and newest modification time of a queryset"""
+    return queryset.aggregate(
+        count=Count(count_field),
+        updated_at=Max(updated_field),
+    )
+
+
+def combine_versions(*versions):
+    """
+    Build an ETag from version data.
+
+    No Last-Modified is derived: deleting rows or changing links does not
+    move the newest ``updated_at`` forward, so clients validating by date
+    alone would get a 304 for stale data.
+    """
+    parts = [f'{version["count"]}:{version["updated_at"]}'
+             for version in versions]
+    return '"%s"' % hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+class ConditionalResponseMixin:
+    """Answer conditional GETs from version data before serializing"""
+
+    def get_version(self, request, *args, **kwargs):
+        """Return the ETag of the current data, or None to skip the check"""
+        return None
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Return 304 when the client copy is current, else ``handler``"""
+        etag = self.get_version(request, *args, **kwargs)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
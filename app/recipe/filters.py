@@ -0,0 +1,29 @@
+"""
+Query filters for recipe apis
+"""
+from django.db.models import Count, Exists, OuterRef
+
+from core.models import Recipe
+
+TAG_MATCH_MODES = ('any', 'all')
+
+
+def filter_any_tags(queryset, tag_ids):
+    """Keep recipes with at least one of the tags, each recipe once"""
+    links = Recipe.tags.through.objects.filter(
+        recipe_id=OuterRef('pk'),
+        tag_id__in=tag_ids,
+    )
+    return queryset.filter(Exists(links))
+
+
+def filter_all_tags(queryset, tag_ids):
+    """Keep recipes that carry every one of the tags"""
+    tag_ids = set(tag_ids)
+    matches = Recipe.tags.through.objects\
+        .filter(tag_id__in=tag_ids)\
+        .values('recipe_id')\
+        .annotate(matched=Count('tag_id'))\
+        .filter(matched=len(tag_ids))\
+        .values('recipe_id')
+    return queryset.filter(pk__in=matches)
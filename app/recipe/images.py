@@ -0,0 +1,155 @@
+"""
+Background processing of uploaded recipe images
+"""
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.models import Recipe
+from recipe.cache import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    'image_thumbnail': (200, 200),
+    'image_medium': (800, 800),
+}
+
+IMAGE_FILE_FIELDS = ('image', *RENDITIONS)
+
+_executors = {}
+
+
+class InlineExecutor:
+    """Executor that runs jobs immediately in the calling thread"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+def _discard_inherited_connections():
+    """Forget database connections copied from the parent process"""
+    for conn in connections.all(initialized_only=True):
+        conn.connection = None
+
+
+def get_executor():
+    """Return the executor configured by IMAGE_PIPELINE_EXECUTOR"""
+    kind = settings.IMAGE_PIPELINE_EXECUTOR
+    workers = settings.IMAGE_PIPELINE_WORKERS
+    key = (kind, workers)
+    if key not in _executors:
+        if kind == 'sync':
+            executor = InlineExecutor()
+        elif kind == 'process':
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('fork'),
+                initializer=_discard_inherited_connections,
+            )
+        elif kind == 'thread':
+            executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix='recipe-image',
+            )
+        else:
+            raise ValueError(f'Unknown image executor {kind!r}')
+        _executors[key] = executor
+    return _executors[key]
+
+
+def schedule_processing(recipe_id):
+    """Queue the recipe image once the upload transaction commits"""
+    transaction.on_commit(
+        lambda: get_executor().submit(process_recipe_image, recipe_id)
+    )
+
+
+def _encode_jpeg(image, quality):
+    """Encode an image as an optimized progressive JPEG"""
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, format='JPEG', quality=quality,
+                              optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _rendition_name(name, suffix):
+    base = os.path.splitext(os.path.basename(name))[0]
+    return f'{base}_{suffix}.jpg'
+
+
+def process_recipe_image(recipe_id):
+    """Decode the uploaded image once and store its renditions"""
+    try:
+        recipe = Recipe.objects.filter(pk=recipe_id).first()
+        if recipe is None or not recipe.image:
+            return None
+        uploaded = recipe.image.name
+        try:
+            _build_renditions(recipe)
+            recipe.image_status = Recipe.ImageStatus.READY
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.exception('Processing image of recipe %s failed',
+                             recipe_id)
+            recipe.image_status = Recipe.ImageStatus.FAILED
+
+        # Only write if the recipe still holds the upload processed here,
+        # a newer upload must not get this job's renditions.
+        stored = {field: getattr(recipe, field).name or None
+                  for field in IMAGE_FILE_FIELDS}
+        updated = Recipe.objects.filter(
+            pk=recipe_id, image=uploaded, image_hash=recipe.image_hash,
+        ).update(image_status=recipe.image_status,
+                 updated_at=timezone.now(), **stored)
+        if not updated:
+            # The files written here are left to gc_recipe_images
+            logger.info('Image of recipe %s changed while processing',
+                        recipe_id)
+            return None
+        invalidate_user(recipe.user_id)
+        return recipe.image_status
+    finally:
+        if settings.IMAGE_PIPELINE_EXECUTOR != 'sync':
+            connections.close_all()
+
+
+def _build_renditions(recipe):
+    """Write renditions and an optimized original of the recipe image"""
+    quality = settings.IMAGE_JPEG_QUALITY
+    with recipe.image.open('rb') as image_file:
+        original_bytes = image_file.read()
+    image = Image.open(io.BytesIO(original_bytes))
+    source_format = image.format
+    image = ImageOps.exif_transpose(image)
+
+    for field, size in RENDITIONS.items():
+        rendition = image.copy()
+        rendition.thumbnail(size)
+        getattr(recipe, field).save(
+            _rendition_name(recipe.image.name, field.split('_')[1]),
+            ContentFile(_encode_jpeg(rendition, quality)),
+            save=False,
+        )
+
+    if source_format == 'JPEG':
+        optimized = _encode_jpeg(image, quality)
+        if len(optimized) < len(original_bytes):
+            recipe.image.save(os.path.basename(recipe.image.name),
+                              ContentFile(optimized), save=False)
@@ -0,0 +1,40 @@
+"""
+Pagination for recipe apis
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the ``-id`` ordering.
+
+    Pages seek with ``id < last_seen`` instead of OFFSET, so page 1000
+    costs the same as page 1. Pagination is opt-in: a request is only
+    paginated when it sends ``cursor`` or ``page_size``.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def is_requested(self, request):
+        """Return True when the client opted in to pagination"""
+        params = request.query_params
+        return (self.cursor_query_param in params or
+                self.page_size_query_param in params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate only requests that opted in"""
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_schema_operation_parameters(self, view):
+        """Document the opt-in behaviour of the parameters"""
+        parameters = super().get_schema_operation_parameters(view)
+        for parameter in parameters:
+            parameter['description'] += (
+                ' Sending this parameter switches the response to a'
+                ' paginated envelope.'
+            )
+        return parameters
@@ -0,0 +1,53 @@
+"""
+Parsers for recipe apis
+"""
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONStream:
+    """
+    Iterator decoding an NDJSON body one line at a time.
+
+    ``line`` is the physical line number of the last object returned,
+    blank lines included, so errors can point at the right line.
+    """
+
+    def __init__(self, stream, encoding):
+        self._lines = enumerate(stream, start=1)
+        self._encoding = encoding
+        self.line = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        for number, line in self._lines:
+            line = line.decode(self._encoding).strip()
+            if not line:
+                continue
+            self.line = number
+            try:
+                return json.loads(line)
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error on line {number}: {exc}')
+        raise StopIteration
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline delimited JSON into a lazy iterator of objects"""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Return an ``NDJSONStream`` over the request body.
+
+        Nothing is read until the view iterates, so a malformed line
+        raises ``ParseError`` while the view consumes the items.
+        """
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return NDJSONStream(stream, encoding)
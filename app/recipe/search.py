@@ -0,0 +1,100 @@
+"""
+Full-text search for recipes
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+
+from core.models import Recipe, Tag
+
+# Fields feeding the search document besides the tag names
+INDEXED_FIELDS = frozenset({'title', 'description'})
+
+_pending = ContextVar('search_pending', default=None)
+
+
+def full_text_available():
+    """Return True when the database supports tsvector search"""
+    return connection.vendor == 'postgresql'
+
+
+def search_document():
+    """Weighted search vector over title, description and tag names"""
+    config = settings.RECIPE_SEARCH_CONFIG
+    tag_names = Tag.objects.filter(recipe=OuterRef('pk'))\
+        .values('recipe')\
+        .annotate(names=StringAgg('name', ' '))\
+        .values('names')
+    return (
+        SearchVector('title', weight='A', config=config) +
+        SearchVector('description', weight='B', config=config) +
+        SearchVector(Subquery(tag_names), weight='C', config=config)
+    )
+
+
+def update_search_vectors(recipe_ids):
+    """Recompute the stored search vector of the given recipes"""
+    if not full_text_available() or not recipe_ids:
+        return
+    pending = _pending.get()
+    if pending is not None:
+        pending.update(recipe_ids)
+        return
+    _write_vectors(recipe_ids)
+
+
+def _write_vectors(recipe_ids):
+    Recipe.objects.filter(pk__in=recipe_ids)\
+        .update(search_vector=search_document())
+
+
+@contextmanager
+def deferred_search_index():
+    """
+    Collect vector refreshes made in the block and run them once at its end.
+
+    A recipe saved and then re-tagged is indexed with one ``UPDATE`` after
+    its tags are in place instead of once per signal.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+    pending = set()
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    if pending:
+        _write_vectors(sorted(pending))
+
+
+def scan_recipes(queryset, term):
+    """Portable substring search used when tsvector is unavailable"""
+    tags = Tag.objects.filter(recipe=OuterRef('pk'), name__icontains=term)
+    return queryset.filter(
+        Q(title__icontains=term) |
+        Q(description__icontains=term) |
+        Exists(tags)
+    )
+
+
+def search_recipes(queryset, term):
+    """Filter recipes matching ``term``, best matches first"""
+    if not full_text_available():
+        return scan_recipes(queryset, term).order_by('-id')
+
+    query = SearchQuery(term, search_type='websearch',
+                        config=settings.RECIPE_SEARCH_CONFIG)
+    return queryset.filter(search_vector=query)\
+        .annotate(rank=SearchRank(F('search_vector'), query))\
+        .order_by('-rank', '-id')
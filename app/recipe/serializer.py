@@ -2,8 +2,10 @@
 Serializer for recipe
 """
 
+from django.db import transaction
 from rest_framework import serializers
 from core.models import Recipe, Tag
+from recipe.search import deferred_search_index, update_search_vectors
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -14,6 +16,46 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name')
         read_only_fields = ('id',)
 
+    def validate_name(self, value):
+        """Reject renaming a tag to a name the user already has"""
+        request = self.context.get('request')
+        if self.instance is None or request is None:
+            return value
+        taken = Tag.objects.filter(user=request.user, name=value)\
+            .exclude(pk=self.instance.pk).exists()
+        if taken:
+            raise serializers.ValidationError(
+                'A tag with this name already exists.')
+        return value
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Create many recipes with chunked bulk inserts"""
+    batch_size = 500
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """Insert the recipes, then link all their tags at once"""
+        tag_payloads = [attrs.pop('tags', []) for attrs in validated_data]
+        recipes = Recipe.objects.bulk_create(
+            [Recipe(**attrs) for attrs in validated_data],
+            batch_size=self.batch_size,
+        )
+
+        tags = {tag.name: tag for tag in self.child._resolve_tags(
+            [tag for payload in tag_payloads for tag in payload]
+        )}
+        through = Recipe.tags.through
+        through.objects.bulk_create(
+            [through(recipe_id=recipe.id, tag_id=tags[name].id)
+             for recipe, payload in zip(recipes, tag_payloads)
+             for name in dict.fromkeys(tag['name'] for tag in payload)],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        update_search_vectors([recipe.id for recipe in recipes])
+        return recipes
+
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Serializer for """
@@ -23,41 +65,78 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ['id', 'title', 'time_minutes', 'price', 'link', 'tags']
         read_only_fields = ['id']
+        list_serializer_class = RecipeListSerializer
 
-    def _get_or_create_tags(self, tags, recipe):
-        """Hadle get or create tag"""
+    def _existing_tags(self, user, names):
+        """Map name to tag for the user's tags with the given names"""
+        return {tag.name: tag
+                for tag in Tag.objects.filter(user=user, name__in=names)}
+
+    def _resolve_tags(self, tags):
+        """Return the user's tags for the payload, creating missing ones"""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag
+        names = list(dict.fromkeys(tag['name'] for tag in tags))
+        if not names:
+            return []
+
+        existing = self._existing_tags(auth_user, names)
+        missing = [name for name in names if name not in existing]
+        if missing:
+            # A concurrent request may insert the same names first; the
+            # (user, name) constraint turns those rows into no-ops and
+            # the re-read picks up whichever insert won.
+            Tag.objects.bulk_create(
+                [Tag(user=auth_user, name=name) for name in missing],
+                ignore_conflicts=True,
             )
-            recipe.tags.add(tag_obj)
+            existing.update(self._existing_tags(auth_user, missing))
 
+        return [existing[name] for name in names]
+
+    def _get_or_create_tags(self, tags, recipe):
+        """Attach tags to the recipe with one insert into recipe_tags"""
+        through = Recipe.tags.through
+        through.objects.bulk_create(
+            [through(recipe_id=recipe.id, tag_id=tag.id)
+             for tag in self._resolve_tags(tags)],
+            ignore_conflicts=True,
+        )
+
+    @transaction.atomic
     def create(self, validated_data):
         """Create a recipe"""
         tags = validated_data.pop('tags', [])
-        recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
+        with deferred_search_index():
+            recipe = Recipe.objects.create(**validated_data)
+            if tags:
+                self._get_or_create_tags(tags, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update func"""
         tags = validated_data.pop('tags', None)
-        if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        with deferred_search_index():
+            if tags is not None:
+                # set() diffs against the current links and only writes
+                # the rows that were added or removed.
+                instance.tags.set(self._resolve_tags(tags))
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
         return instance
 
 
+IMAGE_FIELDS = ['image', 'image_status', 'image_thumbnail', 'image_medium']
+
+
 class RecipeDetailSerializer(RecipeSerializer):
     """Recipe details"""
 
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description']
+        fields = RecipeSerializer.Meta.fields + ['description'] + IMAGE_FIELDS
+        read_only_fields = RecipeSerializer.Meta.read_only_fields + \
+            IMAGE_FIELDS
 
 
 class RecipeImageSerializer(serializers.ModelSerializer):
@@ -65,6 +144,35 @@ class RecipeImageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
-        read_only_fields = ['id']
+        fields = ['id'] + IMAGE_FIELDS
+        read_only_fields = ['id', 'image_status', 'image_thumbnail',
+                            'image_medium']
         extra_kwargs = {'image': {'required': 'True'}}
+
+    def update(self, instance, validated_data):
+        """Store the image, reusing the renditions of an identical upload"""
+        image = validated_data['image']
+        instance.image_hash = getattr(image, 'sha256', '')
+        twin = None
+        if instance.image_hash:
+            # Only the owner's recipes, other users' uploads must not
+            # leak through; storage shares the bytes across users anyway.
+            twin = Recipe.objects.filter(
+                user_id=instance.user_id, image_hash=instance.image_hash,
+            ).exclude(image='').exclude(pk=instance.pk).first()
+
+        if twin is None:
+            instance.image_status = Recipe.ImageStatus.PENDING
+            instance.image_thumbnail = None
+            instance.image_medium = None
+            return super().update(instance, validated_data)
+
+        validated_data.pop('image')
+        instance.image.name = twin.image.name
+        if twin.image_status == Recipe.ImageStatus.READY:
+            instance.image_status = twin.image_status
+            instance.image_thumbnail.name = twin.image_thumbnail.name
+            instance.image_medium.name = twin.image_medium.name
+        else:
+            instance.image_status = Recipe.ImageStatus.PENDING
+        return super().update(instance, validated_data)
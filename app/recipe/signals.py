@@ -0,0 +1,82 @@
+"""
+Signal handlers for recipe apis
+"""
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag
+from recipe.cache import invalidate_user
+from recipe.search import (
+    INDEXED_FIELDS,
+    full_text_available,
+    update_search_vectors,
+)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_owner(sender, instance, **kwargs):
+    """Invalidate the owner's cache after a recipe or tag changes"""
+    invalidate_user(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, instance, action, **kwargs):
+    """Invalidate the owner's cache after recipe tags change"""
+    if action.startswith('post_'):
+        invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, update_fields=None, **kwargs):
+    """Refresh the search vector of a saved recipe"""
+    if update_fields is not None and not INDEXED_FIELDS & update_fields:
+        return
+    update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def index_recipe_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh search vectors after recipe tags change"""
+    if not full_text_available():
+        return
+    if not reverse:
+        if action.startswith('post_'):
+            update_search_vectors([instance.pk])
+    elif action == 'pre_clear':
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True))
+    elif action == 'post_clear':
+        update_search_vectors(getattr(instance, '_search_recipe_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        update_search_vectors(list(pk_set))
+
+
+@receiver(post_save, sender=Tag)
+def index_renamed_tag(sender, instance, created, **kwargs):
+    """Refresh search vectors of the recipes carrying a renamed tag"""
+    if created or not full_text_available():
+        return
+    update_search_vectors(
+        list(instance.recipe_set.values_list('id', flat=True)))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tagged_recipes(sender, instance, **kwargs):
+    """Remember which recipes lose the tag being deleted"""
+    if full_text_available():
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def index_deleted_tag(sender, instance, **kwargs):
+    """Refresh search vectors of the recipes that lost a tag"""
+    update_search_vectors(getattr(instance, '_search_recipe_ids', []))
@@ -0,0 +1,129 @@
+"""
+Test for the async recipe read path
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.async_views import async_read_patterns
+from recipe.cache import get_cache
+from recipe.serializer import (
+    RecipeDetailSerializer,
+    RecipeSerializer,
+    TagSerializer,
+)
+from recipe.urls import router
+
+urlpatterns = [
+    path('api/recipe/',
+         include((async_read_patterns(router.urls), 'recipe'))),
+]
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncReadTests(TestCase):
+    """Test reads served by the async views"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com')
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_list_recipes(self):
+        """Test the async list matches the serializer output"""
+        recipe = create_recipe(self.user, title='Soup')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        create_recipe(self.user, title='Stew')
+        create_recipe(get_user_model().objects.create_user(
+            email='other@example.com'))
+
+        res = self.client.get(reverse('recipe:recipe-list'))
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(),
+                         RecipeSerializer(recipes, many=True).data)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertIn('ETag', res)
+
+    def test_list_served_from_cache(self):
+        """Test a repeated read is a cache hit"""
+        create_recipe(self.user)
+        url = reverse('recipe:recipe-list')
+        first = self.client.get(url)
+
+        second = self.client.get(url)
+
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+
+    def test_retrieve_recipe(self):
+        """Test the async detail matches the serializer output"""
+        recipe = create_recipe(self.user, description='Hot')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Dinner'))
+
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[recipe.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), RecipeDetailSerializer(recipe).data)
+
+    def test_retrieve_other_users_recipe_not_found(self):
+        """Test a missing recipe falls back to the DRF 404"""
+        other = get_user_model().objects.create_user(
+            email='other@example.com')
+        recipe = create_recipe(other)
+
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[recipe.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_tags(self):
+        """Test the async tag list matches the serializer output"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        res = self.client.get(reverse('recipe:tag-list'))
+
+        tags = Tag.objects.filter(user=self.user).order_by('-name')
+        self.assertEqual(res.json(), TagSerializer(tags, many=True).data)
+
+    def test_unauthenticated_rejected(self):
+        """Test requests without a valid token get the DRF 401"""
+        self.client.credentials()
+
+        res = self.client.get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_writes_delegated(self):
+        """Test writes still go through the DRF view"""
+        payload = {'title': 'Pie', 'time_minutes': 30,
+                   'price': Decimal('4.50')}
+
+        res = self.client.post(reverse('recipe:recipe-list'), payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Recipe.objects.filter(title='Pie').exists())
@@ -0,0 +1,136 @@
+"""
+Test for the recipe response cache
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.cache import cache_stats, get_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Create recipe url"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheTests(TestCase):
+    """Test cached list and retrieve responses"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_is_served_from_cache(self):
+        """Test a repeated list request runs no queries"""
+        create_recipe(self.user)
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+    def test_query_params_are_cached_separately(self):
+        """Test the tags filter is part of the cache key"""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        create_recipe(self.user)
+
+        res_all = self.client.get(RECIPES_URL)
+        res_tag = self.client.get(RECIPES_URL, {'tags': str(tag.id)})
+
+        self.assertEqual(res_tag['X-Cache'], 'MISS')
+        self.assertEqual(len(res_all.data), 2)
+        self.assertEqual(len(res_tag.data), 1)
+
+    def test_create_invalidates_list(self):
+        """Test creating a recipe invalidates the cached list"""
+        self.client.get(RECIPES_URL)
+        payload = {'title': 'New', 'time_minutes': 5, 'price': '2.00'}
+        self.client.post(RECIPES_URL, payload)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data), 1)
+
+    def test_tag_update_invalidates_recipe_detail(self):
+        """Test renaming a tag invalidates cached recipes"""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        self.client.get(detail_url(recipe.id))
+
+        url = reverse('recipe:tag-detail', args=[tag.id])
+        self.client.patch(url, {'name': 'Vegetarian'})
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['tags'][0]['name'], 'Vegetarian')
+
+    def test_bulk_create_invalidates_tags(self):
+        """Test bulk created tags show up in the cached tag list"""
+        self.client.get(TAGS_URL)
+        payload = [{'title': 'Soup', 'time_minutes': 5, 'price': '1.00',
+                    'tags': [{'name': 'Dinner'}]}]
+        self.client.post(reverse('recipe:recipe-bulk-create'), payload,
+                         format='json')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag['name'] for tag in res.data], ['Dinner'])
+
+    def test_cache_is_per_user(self):
+        """Test users never see each other's cached responses"""
+        create_recipe(self.user)
+        self.client.get(RECIPES_URL)
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data, [])
+
+    def test_cache_stats(self):
+        """Test hits and misses are counted"""
+        self.client.get(TAGS_URL)
+        self.client.get(TAGS_URL)
+
+        stats = cache_stats()
+
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_ratio'], 0.5)
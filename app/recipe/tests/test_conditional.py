@@ -0,0 +1,143 @@
+"""
+Test for conditional GET on recipe apis
+"""
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.cache import get_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Create recipe url"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag handling"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_sends_validators(self):
+        """Test the list response carries an ETag and no Last-Modified"""
+        create_recipe(self.user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
+        self.assertNotIn('Last-Modified', res)
+
+    def test_if_modified_since_after_delete(self):
+        """Test a date-only check is not answered with 304 after a delete"""
+        recipe = create_recipe(self.user)
+        create_recipe(self.user)
+        self.client.get(RECIPES_URL)
+        recipe.delete()
+
+        res = self.client.get(
+            RECIPES_URL, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match returns 304"""
+        create_recipe(self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_list_etag_changes_after_write(self):
+        """Test the ETag changes when a recipe is deleted"""
+        recipe = create_recipe(self.user)
+        create_recipe(self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+        recipe.delete()
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(len(res.data), 1)
+
+    def test_detail_etag_changes_after_tag_rename(self):
+        """Test renaming a tag changes the ETag of its recipes"""
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        res = self.client.get(detail_url(recipe.id),
+                              HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Vegetarian')
+
+    def test_detail_not_modified_skips_serializer(self):
+        """Test a 304 detail response runs only the version queries"""
+        recipe = create_recipe(self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+        get_cache().clear()
+
+        with self.assertNumQueries(2):
+            res = self.client.get(detail_url(recipe.id),
+                                  HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_other_user_not_found(self):
+        """Test conditional headers do not leak other users' recipes"""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123'
+        )
+        recipe = create_recipe(other)
+
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tags_not_modified(self):
+        """Test the tag list honours If-None-Match"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -2,13 +2,23 @@
 Test for recipe apis
 """
 
+import csv
+import hashlib
+import io
+import json
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 import tempfile
 import os
@@ -17,12 +27,17 @@ from PIL import Image
 from core.models import (
     Recipe, Tag
 )
+from recipe import images as recipe_images
+from recipe.images import process_recipe_image
 from recipe.serializer import (
+    RecipeListSerializer,
     RecipeSerializer,
     RecipeDetailSerializer
 )
 
 RECIPES_URL = reverse('recipe:recipe-list')
+BULK_CREATE_URL = reverse('recipe:recipe-bulk-create')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 
 def detail_url(recipe_id):
@@ -291,6 +306,77 @@ class PrivateRecipeAPITest(TestCase):
         self.assertIn(tag_lunch, recipe.tags.all())
         self.assertNotIn(tag_break, recipe.tags.all())
 
+    def test_create_recipe_with_existing_tags(self):
+        """Test creating a recipe reuses tags the user already has"""
+        tag_vegan = sample_tag(self.user, name='Vegan')
+        payload = {
+            'title': 'Pho',
+            'tags': [{'name': 'Vegan'}, {'name': 'Soup'}, {'name': 'Vegan'}],
+            'time_minutes': 30,
+            'price': Decimal('4.00'),
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertIn(tag_vegan, recipe.tags.all())
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_create_recipe_tag_queries_do_not_scale(self):
+        """Test tag resolution cost does not grow with the tag count"""
+        def create_with_tags(count, prefix):
+            payload = {
+                'title': 'Tagged',
+                'tags': [{'name': f'{prefix} {i}'} for i in range(count)],
+                'time_minutes': 5,
+                'price': Decimal('1.00'),
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(RECIPES_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        self.assertEqual(create_with_tags(30, 'many'),
+                         create_with_tags(1, 'one'))
+
+    def test_update_recipe_same_tags_no_writes(self):
+        """Test a patch with unchanged tags leaves recipe_tags alone"""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(sample_tag(self.user, name='Lunch'),
+                        sample_tag(self.user, name='Dinner'))
+        payload = {'tags': [{'name': 'Dinner'}, {'name': 'Lunch'}]}
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(detail_url(recipe.id), payload,
+                                    format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        through = Recipe.tags.through._meta.db_table
+        writes = [
+            query['sql'] for query in queries
+            if through in query['sql'] and
+            query['sql'].lstrip().upper().startswith(('INSERT', 'DELETE'))
+        ]
+        self.assertEqual(writes, [])
+        self.assertEqual(recipe.tags.count(), 2)
+
+    def test_update_recipe_tags_diff(self):
+        """Test a patch only adds and removes the changed tags"""
+        recipe = create_recipe(user=self.user)
+        tag_keep = sample_tag(self.user, name='Keep')
+        tag_drop = sample_tag(self.user, name='Drop')
+        recipe.tags.add(tag_keep, tag_drop)
+        payload = {'tags': [{'name': 'Keep'}, {'name': 'New'}]}
+
+        res = self.client.patch(detail_url(recipe.id), payload,
+                                format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = set(recipe.tags.values_list('name', flat=True))
+        self.assertEqual(names, {'Keep', 'New'})
+        self.assertTrue(Tag.objects.filter(id=tag_drop.id).exists())
+
     def test_filter_by_tags(self):
         """Test filtering by recep"""
         r1 = create_recipe(self.user, title='Ths 1')
@@ -311,6 +397,357 @@ class PrivateRecipeAPITest(TestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_list_not_paginated_by_default(self):
+        """Test the list stays a plain array without opting in"""
+        create_recipe(self.user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.data, list)
+
+    def test_list_cursor_pagination(self):
+        """Test walking the list with cursor pages"""
+        recipes = [create_recipe(self.user) for _ in range(5)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        seen = [item['id'] for item in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            seen.extend(item['id'] for item in res.data['results'])
+
+        expected = sorted((recipe.id for recipe in recipes), reverse=True)
+        self.assertEqual(seen, expected)
+
+    def _list_query_count(self):
+        """Return the number of queries one list request runs"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def _create_tagged_recipe(self, index):
+        recipe = create_recipe(self.user)
+        recipe.tags.add(
+            sample_tag(self.user, name=f'Tag {index} a'),
+            sample_tag(self.user, name=f'Tag {index} b'),
+        )
+        return recipe
+
+    def test_list_query_count_is_constant(self):
+        """Test listing does not run a tag query per recipe"""
+        self._create_tagged_recipe(0)
+        baseline = self._list_query_count()
+
+        for index in range(1, 6):
+            self._create_tagged_recipe(index)
+
+        self.assertEqual(self._list_query_count(), baseline)
+
+    def test_detail_includes_tags(self):
+        """Test the detail response renders prefetched tags"""
+        recipe = self._create_tagged_recipe(0)
+
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.data, RecipeDetailSerializer(recipe).data)
+        self.assertEqual(len(res.data['tags']), 2)
+
+    def test_filter_by_tags_returns_each_recipe_once(self):
+        """Test a recipe matching several tags is listed once"""
+        recipe = create_recipe(self.user)
+        tag1 = sample_tag(self.user, name='Vegan')
+        tag2 = sample_tag(self.user, name='Dinner')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        self.assertEqual([item['id'] for item in res.data], [recipe.id])
+
+    def test_filter_by_all_tags(self):
+        """Test tags_match=all keeps recipes carrying every tag"""
+        tag1 = sample_tag(self.user, name='Vegan')
+        tag2 = sample_tag(self.user, name='Dinner')
+        both = create_recipe(self.user, title='Both')
+        both.tags.add(tag1, tag2)
+        one = create_recipe(self.user, title='One')
+        one.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'tags_match': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data], [both.id])
+
+    def test_filter_invalid_match_mode(self):
+        """Test an unknown tags_match value is rejected"""
+        tag = sample_tag(self.user)
+        params = {'tags': str(tag.id), 'tags_match': 'some'}
+
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_title_description_and_tags(self):
+        """Test search matches title, description and tag names"""
+        by_title = create_recipe(self.user, title='Beef lasagna',
+                                 description='')
+        by_description = create_recipe(self.user, title='Bake',
+                                       description='Baked lasagna sheets')
+        by_tag = create_recipe(self.user, title='Pasta', description='')
+        by_tag.tags.add(sample_tag(self.user, name='Lasagna'))
+        create_recipe(self.user, title='Curry', description='')
+
+        res = self.client.get(RECIPES_URL, {'search': 'lasagna'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = {item['id'] for item in res.data}
+        self.assertEqual(ids, {by_title.id, by_description.id, by_tag.id})
+
+    def test_search_limited_to_user(self):
+        """Test search never returns other users' recipes"""
+        other = create_user(email='other@example.com', password='pass1234')
+        create_recipe(other, title='Beef lasagna')
+
+        res = self.client.get(RECIPES_URL, {'search': 'lasagna'})
+
+        self.assertEqual(res.data, [])
+
+
+@patch('recipe.signals.full_text_available', return_value=True)
+@patch('recipe.search.full_text_available', return_value=True)
+@patch('recipe.search._write_vectors')
+class SearchIndexTests(TestCase):
+    """Test search vectors are written once per recipe write"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_create_with_tags_indexes_once(self, write, *mocks):
+        """Test a create with tags refreshes the vector once"""
+        payload = {'title': 'Curry', 'time_minutes': 30, 'price': '6.00',
+                   'tags': [{'name': 'Dinner'}, {'name': 'Spicy'}]}
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        write.assert_called_once_with([res.data['id']])
+
+    def test_update_tags_indexes_once(self, write, *mocks):
+        """Test re-tagging and renaming a recipe refreshes it once"""
+        recipe = create_recipe(self.user)
+        recipe.tags.add(sample_tag(self.user, name='Lunch'))
+        write.reset_mock()
+        payload = {'title': 'Renamed', 'tags': [{'name': 'Dinner'}]}
+
+        self.client.patch(detail_url(recipe.id), payload, format='json')
+
+        write.assert_called_once_with([recipe.id])
+
+    def test_image_fields_save_skips_index(self, write, *mocks):
+        """Test saves that touch no indexed field leave the vector alone"""
+        recipe = create_recipe(self.user)
+        write.reset_mock()
+
+        recipe.image_status = Recipe.ImageStatus.FAILED
+        recipe.save(update_fields=['image_status'])
+
+        write.assert_not_called()
+
+
+class BulkRecipeAPITest(TestCase):
+    """Test bulk import and export of recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_json(self):
+        """Test creating recipes from a JSON array"""
+        payload = [
+            {'title': 'Curry', 'time_minutes': 30, 'price': '6.00',
+             'tags': [{'name': 'Dinner'}, {'name': 'Spicy'}]},
+            {'title': 'Soup', 'time_minutes': 20, 'price': '3.50',
+             'tags': [{'name': 'Dinner'}]},
+        ]
+        res = self.client.post(BULK_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 2)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        curry = recipes.get(title='Curry')
+        self.assertEqual(curry.tags.count(), 2)
+
+    def test_bulk_create_ndjson(self):
+        """Test creating recipes from an NDJSON stream"""
+        lines = [
+            {'title': f'Recipe {i}', 'time_minutes': 5, 'price': '1.00'}
+            for i in range(3)
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines) + '\n'
+        res = self.client.post(BULK_CREATE_URL, body,
+                               content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+
+    def test_bulk_create_ndjson_streams_in_batches(self):
+        """Test NDJSON items are validated and saved batch by batch"""
+        lines = [
+            {'title': f'Recipe {i}', 'time_minutes': 5, 'price': '1.00'}
+            for i in range(5)
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines) + '\n'
+        saving = patch.object(RecipeListSerializer, 'create', autospec=True,
+                              side_effect=RecipeListSerializer.create)
+        with patch.object(RecipeListSerializer, 'batch_size', 2), \
+                saving as create:
+            res = self.client.post(BULK_CREATE_URL, body,
+                                   content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 5)
+        self.assertEqual(
+            [len(call.args[1]) for call in create.call_args_list],
+            [2, 2, 1])
+
+    def test_bulk_create_ndjson_late_error_creates_nothing(self):
+        """Test an invalid line after saved batches rolls back everything"""
+        lines = [
+            json.dumps({'title': f'Recipe {i}', 'time_minutes': 5,
+                        'price': '1.00'})
+            for i in range(3)
+        ] + [json.dumps({'title': 'Broken'}), '{not json']
+        with patch.object(RecipeListSerializer, 'batch_size', 2):
+            res = self.client.post(BULK_CREATE_URL, '\n'.join(lines),
+                                   content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(4, res.data['lines'])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_ndjson_errors_use_physical_lines(self):
+        """Test blank lines still count towards reported line numbers"""
+        lines = [
+            json.dumps({'title': 'Soup', 'time_minutes': 5, 'price': '1.00'}),
+            '',
+            json.dumps({'title': 'Broken'}),
+        ]
+        res = self.client.post(BULK_CREATE_URL, '\n'.join(lines),
+                               content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data['lines']), [3])
+
+    def test_bulk_create_invalid_creates_nothing(self):
+        """Test one invalid recipe rejects the whole batch"""
+        payload = [
+            {'title': 'Curry', 'time_minutes': 30, 'price': '6.00'},
+            {'title': 'Broken'},
+        ]
+        res = self.client.post(BULK_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_export_ndjson(self):
+        """Test exporting streams one recipe per line"""
+        recipe = create_recipe(self.user)
+        recipe.tags.add(sample_tag(self.user))
+        create_recipe(self.user)
+        create_recipe(create_user(email='other@example.com',
+                                  password='password123'))
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1], json.loads(json.dumps(
+            RecipeDetailSerializer(recipe).data)))
+
+    def test_list_stream_ndjson(self):
+        """Test the list can be streamed as NDJSON"""
+        create_recipe(self.user)
+        create_recipe(self.user)
+
+        res = self.client.get(RECIPES_URL, {'stream': 'ndjson'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        expected = json.loads(json.dumps(
+            RecipeSerializer(recipes, many=True).data))
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    async def _asgi_get(self, url, data=None):
+        """GET through the ASGI handler with a token"""
+        token = await Token.objects.acreate(user=self.user)
+        return await AsyncClient().get(
+            url, data, headers={'Authorization': f'Token {token.key}'})
+
+    async def test_export_streams_async_under_asgi(self):
+        """Test ASGI export yields rows in batches instead of buffering"""
+        for title in ('Soup', 'Stew', 'Salad'):
+            await Recipe.objects.acreate(user=self.user, title=title,
+                                         time_minutes=5, price='1.00')
+
+        with patch('recipe.streaming.ASYNC_BATCH_SIZE', 1):
+            res = await self._asgi_get(EXPORT_URL)
+            self.assertTrue(res.is_async)
+            parts = [part async for part in res.streaming_content]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(parts), 3)
+        titles = [json.loads(part)['title'] for part in parts]
+        self.assertEqual(titles, ['Salad', 'Stew', 'Soup'])
+
+    async def test_list_stream_async_under_asgi(self):
+        """Test ASGI list streaming matches the serializer output"""
+        await Recipe.objects.acreate(user=self.user, title='Soup',
+                                     time_minutes=5, price='1.00')
+
+        res = await self._asgi_get(RECIPES_URL, {'stream': 'ndjson'})
+
+        self.assertTrue(res.is_async)
+        content = b''.join([part async for part in res.streaming_content])
+        self.assertEqual(json.loads(content)['title'], 'Soup')
+
+    def test_list_stream_csv(self):
+        """Test the list can be streamed as CSV"""
+        recipe = create_recipe(self.user, title='Stew')
+        recipe.tags.add(sample_tag(self.user, name='Winter'),
+                        sample_tag(self.user, name='Dinner'))
+
+        res = self.client.get(RECIPES_URL, {'stream': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(
+            b''.join(res.streaming_content).decode().splitlines()))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Stew')
+        self.assertEqual(set(rows[0]['tags'].split('|')),
+                         {'Winter', 'Dinner'})
+
+    def test_list_stream_invalid_format(self):
+        """Test an unknown stream format is rejected"""
+        res = self.client.get(RECIPES_URL, {'stream': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class ImageUploadTests(TestCase):
 
@@ -325,21 +762,155 @@ class ImageUploadTests(TestCase):
         self.recipe = create_recipe(user=self.user)
 
     def tearDown(self):
+        self.recipe.refresh_from_db()
         self.recipe.image.delete()
+        self.recipe.image_thumbnail.delete()
+        self.recipe.image_medium.delete()
 
-    def test_upload_image(self):
+    def _upload(self, size=(10, 10)):
         url = image_upload_url(self.recipe.id)
         with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
-            img = Image.new('RGB', (10, 10))
+            img = Image.new('RGB', size)
             img.save(image_file, format='JPEG')
             image_file.seek(0)
             payload = {'image': image_file}
-            res = self.client.post(url, payload, format='multipart')
+            return self.client.post(url, payload, format='multipart')
+
+    def test_upload_image(self):
+        res = self._upload()
         self.recipe.refresh_from_db()
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('image', res.data)
+        self.assertEqual(res.data['image_status'], 'pending')
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    @override_settings(IMAGE_PIPELINE_EXECUTOR='sync')
+    def test_upload_image_builds_renditions(self):
+        """Test the worker stores resized renditions after commit"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(size=(1600, 1200))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, 'ready')
+        with Image.open(self.recipe.image_thumbnail.path) as thumbnail:
+            self.assertEqual(thumbnail.size, (200, 150))
+        with Image.open(self.recipe.image_medium.path) as medium:
+            self.assertEqual(medium.size, (800, 600))
+
+    @override_settings(IMAGE_PIPELINE_EXECUTOR='sync')
+    def test_stale_job_keeps_newer_upload(self):
+        """Test a job finishing after a newer upload discards its output"""
+        self.recipe.image.save('first.png', ContentFile(
+            self._image_bytes(image_format='PNG')))
+        newer = {'image': 'uploads/newer.jpg', 'image_hash': 'b' * 64,
+                 'image_status': 'pending'}
+        build = recipe_images._build_renditions
+
+        def build_during_upload(recipe):
+            build(recipe)
+            Recipe.objects.filter(pk=recipe.pk).update(**newer)
+
+        with patch.object(recipe_images, '_build_renditions',
+                          side_effect=build_during_upload), \
+                self.captureOnCommitCallbacks(execute=True):
+            result = process_recipe_image(self.recipe.id)
+
+        self.assertIsNone(result)
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.image.name, newer['image'])
+        self.assertEqual(recipe.image_status, 'pending')
+        self.assertFalse(recipe.image_thumbnail)
+        self.assertFalse(recipe.image_medium)
+        recipe.image = None
+        recipe.save(update_fields=['image'])
+
+    @override_settings(IMAGE_PIPELINE_EXECUTOR='sync')
+    def test_unreadable_image_marked_failed(self):
+        """Test an image the worker cannot decode is marked failed"""
+        self.recipe.image.save('broken.jpg', ContentFile(b'not an image'))
+
+        with self.assertLogs('recipe.images', level='ERROR'):
+            result = process_recipe_image(self.recipe.id)
+
+        self.assertEqual(result, 'failed')
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, 'failed')
+        self.assertFalse(self.recipe.image_thumbnail)
+
+    def _image_bytes(self, size=(10, 10), image_format='JPEG'):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color='red').save(buffer, format=image_format)
+        return buffer.getvalue()
+
+    def _post_bytes(self, recipe, data, name='image.jpg'):
+        url = image_upload_url(recipe.id)
+        payload = {'image': SimpleUploadedFile(name, data)}
+        return self.client.post(url, payload, format='multipart')
+
+    def test_upload_image_rejects_format(self):
+        """Test formats outside the allowed list are rejected"""
+        data = self._image_bytes(image_format='BMP')
+        res = self._post_bytes(self.recipe, data, name='image.bmp')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('BMP', res.data['image'][0])
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=50)
+    def test_upload_image_rejects_dimensions(self):
+        """Test images with too many pixels are rejected"""
+        res = self._post_bytes(self.recipe, self._image_bytes())
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['image'],
+                         ['Image dimensions are too large.'])
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=100)
+    def test_upload_image_rejects_size(self):
+        """Test bodies over the byte limit are rejected"""
+        res = self._post_bytes(self.recipe, self._image_bytes())
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_image_rejects_garbage(self):
+        """Test bytes that are not an image are rejected"""
+        res = self._post_bytes(self.recipe, b'not an image at all')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['image'], ['Upload a valid image.'])
+
+    def test_upload_duplicate_image_shares_file(self):
+        """Test identical uploads are stored once"""
+        data = self._image_bytes()
+        other = create_recipe(user=self.user)
+        self._post_bytes(self.recipe, data)
+        self._post_bytes(other, data)
+
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.recipe.image_hash,
+                         hashlib.sha256(data).hexdigest())
+        self.assertEqual(other.image.name, self.recipe.image.name)
+
+    def test_upload_duplicate_of_other_user_is_processed(self):
+        """Test another user's identical image is not looked up"""
+        data = self._image_bytes()
+        stranger = create_user(email='other@example.com',
+                               password='password123')
+        create_recipe(
+            user=stranger, image='recipes/theirs.jpg',
+            image_hash=hashlib.sha256(data).hexdigest(),
+            image_status='ready', image_thumbnail='recipes/theirs_thumb.jpg',
+        )
+
+        res = self._post_bytes(self.recipe, data)
+
+        self.assertEqual(res.data['image_status'], 'pending')
+        self.recipe.refresh_from_db()
+        self.assertNotEqual(self.recipe.image.name, 'recipes/theirs.jpg')
+        self.assertFalse(self.recipe.image_thumbnail)
+
     def test_upload_image_bad_request(self):
         """Invalid image"""
         url = image_upload_url(self.recipe.id)
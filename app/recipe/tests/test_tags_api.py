@@ -90,6 +90,18 @@ class PrivateTagsApiTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_tag_update_duplicate_name(self):
+        """Test renaming a tag to an existing name fails"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        tag = Tag.objects.create(user=self.user, name='Fruity')
+        url = tag_details_url(tag.id)
+
+        res = self.client.patch(url, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Fruity')
+
     def test_delete_tag(self):
         """Test for deleting api"""
         tag = Tag.objects.create(user=self.user, name='Fruity')
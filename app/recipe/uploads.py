@@ -0,0 +1,85 @@
+"""
+Upload handling for recipe images
+"""
+import hashlib
+import io
+import warnings
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    SkipFile,
+    TemporaryFileUploadHandler,
+)
+from PIL import Image, UnidentifiedImageError
+
+SNIFF_LIMIT = 64 * 1024
+
+
+class RecipeImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream image uploads to a temporary file.
+
+    The header is inspected as soon as enough bytes arrive, so a wrong
+    format, oversized dimensions or an oversized body is dropped without
+    buffering or writing the rest. The content hash is computed while
+    the chunks stream through.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rejection = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.header = bytearray()
+        self.sniffed = False
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.RECIPE_IMAGE_MAX_BYTES:
+            limit = settings.RECIPE_IMAGE_MAX_BYTES // 1024
+            self._reject(f'Image is larger than {limit} KB.')
+
+        if not self.sniffed:
+            self.header += raw_data
+            self._sniff()
+
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if not self.sniffed:
+            self.rejection = 'Upload a valid image.'
+            self.file.close()
+            return None
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.sha256.hexdigest()
+        return uploaded
+
+    def _sniff(self):
+        """Check format and dimensions once the header is readable"""
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', Image.DecompressionBombWarning)
+                image = Image.open(io.BytesIO(bytes(self.header)))
+        except (Image.DecompressionBombWarning,
+                Image.DecompressionBombError):
+            self._reject('Image dimensions are too large.')
+        except (UnidentifiedImageError, OSError, SyntaxError):
+            if len(self.header) >= SNIFF_LIMIT:
+                self._reject('Upload a valid image.')
+            return
+
+        self.sniffed = True
+        self.header = None
+        if image.format not in settings.RECIPE_IMAGE_FORMATS:
+            self._reject(f'Image format {image.format} is not supported.')
+        width, height = image.size
+        if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+            self._reject('Image dimensions are too large.')
+
+    def _reject(self, reason):
+        self.rejection = reason
+        raise SkipFile(reason)
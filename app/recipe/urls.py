@@ -1,5 +1,6 @@
 """Url mapping"""
 
+from django.conf import settings
 from django.urls import (
     path,
     include
@@ -7,6 +8,7 @@ from django.urls import (
 
 from rest_framework.routers import DefaultRouter
 from recipe import views
+from recipe.async_views import async_read_patterns
 
 router = DefaultRouter()
 
@@ -15,6 +17,10 @@ router.register('tags', views.TagViewSet)
 
 app_name = 'recipe'
 
+router_urls = router.urls
+if settings.RECIPE_ASYNC_READS:
+    router_urls = async_read_patterns(router_urls)
+
 urlpatterns = [
-    path('', include(router.urls))
+    path('', include(router_urls))
 ]
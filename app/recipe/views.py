@@ -2,8 +2,17 @@
 Views for rrecipe api
 """
 
+from collections.abc import Iterator
+from contextlib import nullcontext
+from functools import partial
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import (
     extend_schema_view,
@@ -12,27 +21,75 @@ from drf_spectacular.utils import (
     OpenApiTypes
 )
 
+from core.db_router import ReplicaPinMixin
+from core.instrumentation import InstrumentedViewMixin
 from core.models import Recipe, Tag
 from recipe import serializer
+from recipe.cache import CachedResponseMixin, invalidate_user
+from recipe.conditional import (
+    ConditionalResponseMixin,
+    combine_versions,
+    version_of,
+)
+from recipe.filters import (
+    TAG_MATCH_MODES,
+    filter_all_tags,
+    filter_any_tags,
+)
+from recipe.images import schedule_processing
+from recipe.pagination import RecipeCursorPagination
+from recipe.parsers import NDJSONParser
+from recipe.search import search_recipes
+from recipe.streaming import STREAM_FORMATS, aiter_lines
+from recipe.uploads import RecipeImageUploadHandler
+from user.authentication import CachedTokenAuthentication
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 
 @extend_schema_view(
     list=extend_schema(
-        OpenApiParameter(
-            'tags',
-            OpenApiTypes.STR,
-            discription="Tags filter"
-        )
+        parameters=[
+            OpenApiParameter(
+                'tags',
+                OpenApiTypes.STR,
+                description="Comma separated list of tag IDs to filter"
+            ),
+            OpenApiParameter(
+                'tags_match',
+                OpenApiTypes.STR,
+                enum=list(TAG_MATCH_MODES),
+                description="Return recipes with any (default) or all"
+                            " of the tags"
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description="Full-text search over title, description and"
+                            " tag names, best matches first. Cursor pages"
+                            " are ordered by id instead of rank."
+            ),
+            OpenApiParameter(
+                'stream',
+                OpenApiTypes.STR,
+                enum=list(STREAM_FORMATS),
+                description="Stream every recipe as NDJSON or CSV"
+                            " instead of returning a JSON array"
+            ),
+        ]
     )
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(InstrumentedViewMixin,
+                    ReplicaPinMixin,
+                    ConditionalResponseMixin,
+                    CachedResponseMixin,
+                    viewsets.ModelViewSet):
     """View for manage recipe APIs."""
     serializer_class = serializer.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
 
     def _params_to_ints(self, qs):
         """return"""
@@ -42,13 +99,44 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """By user"""
         tags = self.request.query_params.get("tags")
-        queryset = self.queryset
+        queryset = self.queryset.filter(user=self.request.user)
         if tags:
             tags_id = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tags_id)
+            if self._tags_match() == 'all':
+                queryset = filter_all_tags(queryset, tags_id)
+            else:
+                queryset = filter_any_tags(queryset, tags_id)
 
-        return queryset.filter(user=self.request.user)\
-            .order_by('-id').distinct()
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = search_recipes(queryset, search)
+        else:
+            queryset = queryset.order_by('-id')
+        if self.action in ('list', 'retrieve', 'export'):
+            queryset = queryset.only(*self._serializer_columns())\
+                .prefetch_related(Prefetch(
+                    'tags',
+                    queryset=Tag.objects.only('id', 'name')
+                ))
+        else:
+            queryset = queryset.defer('search_vector')
+
+        return queryset
+
+    def _tags_match(self):
+        """Return the requested tag match mode"""
+        mode = self.request.query_params.get('tags_match', 'any')
+        if mode not in TAG_MATCH_MODES:
+            raise ValidationError(
+                {'tags_match': f'Choose one of {", ".join(TAG_MATCH_MODES)}.'}
+            )
+        return mode
+
+    def _serializer_columns(self):
+        """Recipe columns rendered by the serializer of this action"""
+        fields = self.get_serializer_class().Meta.fields
+        concrete = {field.name for field in Recipe._meta.concrete_fields}
+        return [name for name in fields if name in concrete]
 
     def get_serializer_class(self):
         """Change serializer"""
@@ -58,6 +146,66 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return serializer.RecipeImageSerializer
         return self.serializer_class
 
+    def list(self, request, *args, **kwargs):
+        """List recipes, streaming them when ``stream`` is requested"""
+        stream = request.query_params.get('stream')
+        if stream:
+            return self._stream_response(stream)
+        return self.conditional_response(
+            partial(self.cached_response, super().list),
+            request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a recipe through the response cache"""
+        return self.conditional_response(
+            partial(self.cached_response, super().retrieve),
+            request, *args, **kwargs
+        )
+
+    def get_version(self, request, *args, **kwargs):
+        """Cached version data of the recipes and tags a read renders"""
+        return self.cached_value(
+            'etag',
+            partial(self._read_version, request, **kwargs),
+            request, *args, **kwargs
+        )
+
+    def _read_version(self, request, **kwargs):
+        """Version data of the recipes and tags a read renders"""
+        user = request.user
+        if self.action == 'list':
+            return combine_versions(
+                version_of(Recipe.objects.filter(user=user)),
+                version_of(Tag.objects.filter(user=user)),
+            )
+
+        try:
+            recipe = version_of(
+                Recipe.objects.filter(user=user, pk=kwargs['pk']))
+        except (TypeError, ValueError):
+            return None
+        if not recipe['count']:
+            return None
+        return combine_versions(
+            recipe,
+            version_of(Tag.objects.filter(recipe__id=kwargs['pk'])),
+        )
+
+    def _stream_response(self, stream_format):
+        """Stream the filtered recipes row by row"""
+        if stream_format not in STREAM_FORMATS:
+            raise ValidationError(
+                {'stream': f'Choose one of {", ".join(STREAM_FORMATS)}.'}
+            )
+        rows, content_type = STREAM_FORMATS[stream_format]
+        queryset = self.filter_queryset(self.get_queryset())
+        lines = rows(queryset, self.get_serializer())
+        if isinstance(self.request._request, ASGIRequest):
+            lines = aiter_lines(lines)
+
+        return StreamingHttpResponse(lines, content_type=content_type)
+
     def perform_create(self, serializer):
         """Create recipe"""
         serializer.save(user=self.request.user)
@@ -65,24 +213,114 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         recipe = self.get_object()
+        upload_handler = RecipeImageUploadHandler()
+        request.upload_handlers = [upload_handler]
         serializer = self.get_serializer(recipe, data=self.request.data)
+        if upload_handler.rejection:
+            return Response({'image': [upload_handler.rejection]},
+                            status=status.HTTP_400_BAD_REQUEST)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            recipe = serializer.save()
+            if recipe.image_status == Recipe.ImageStatus.PENDING:
+                schedule_processing(recipe.id)
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        request=serializer.RecipeDetailSerializer(many=True),
+        responses={201: OpenApiTypes.OBJECT}
+    )
+    @action(methods=['POST'], detail=False, url_path='bulk-create',
+            parser_classes=[JSONParser, NDJSONParser])
+    def bulk_create(self, request):
+        """Create recipes from a JSON array or an NDJSON stream"""
+        streaming = isinstance(request.data, Iterator)
+        ids = []
+        # Streams save several batches, one transaction keeps them
+        # all or nothing; a JSON array is a single atomic batch.
+        with transaction.atomic() if streaming else nullcontext():
+            for lines, batch in self._bulk_batches(request.data):
+                serializer = self.get_serializer(data=batch, many=True)
+                if not serializer.is_valid():
+                    errors = serializer.errors
+                    if streaming:
+                        # Report stream errors by line, batches are partial
+                        errors = {'lines': {
+                            lines[index]: error
+                            for index, error in enumerate(errors) if error
+                        }}
+                    raise ValidationError(errors)
+                ids += [r.id for r in serializer.save(user=request.user)]
+        # bulk_create sends no signals, so invalidate explicitly.
+        invalidate_user(self.request.user.id)
+
+        return Response(
+            {'created': len(ids), 'ids': ids},
+            status=status.HTTP_201_CREATED
+        )
+
+    def _bulk_batches(self, data):
+        """
+        Yield (line numbers, items) batches, streams are never materialized.
+
+        A JSON array is one batch without line numbers.
+        """
+        if not isinstance(data, Iterator):
+            yield None, data
+            return
+        size = serializer.RecipeListSerializer.batch_size
+        lines, batch = [], []
+        for item in data:
+            lines.append(data.line)
+            batch.append(item)
+            if len(batch) == size:
+                yield lines, batch
+                lines, batch = [], []
+        if batch:
+            yield lines, batch
 
-class TagViewSet(mixins.UpdateModelMixin,
+    @extend_schema(
+        responses={
+            (200, NDJSONParser.media_type): serializer.RecipeDetailSerializer
+        }
+    )
+    @action(methods=['GET'], detail=False)
+    def export(self, request):
+        """Stream the recipes as NDJSON"""
+        return self._stream_response('ndjson')
+
+
+class TagViewSet(InstrumentedViewMixin,
+                 ReplicaPinMixin,
+                 ConditionalResponseMixin,
+                 CachedResponseMixin,
+                 mixins.UpdateModelMixin,
                  mixins.ListModelMixin,
                  mixins.DestroyModelMixin,
                  viewsets.GenericViewSet):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
     serializer_class = serializer.TagSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         """Filter query set to authenticated"""
         return self.queryset.filter(user=self.request.user).order_by("-name")
+
+    def list(self, request, *args, **kwargs):
+        """List tags through the response cache"""
+        return self.conditional_response(
+            partial(self.cached_response, super().list),
+            request, *args, **kwargs
+        )
+
+    def get_version(self, request, *args, **kwargs):
+        """Cached version data of the user's tags"""
+        return self.cached_value(
+            'etag',
+            lambda: combine_versions(
+                version_of(Tag.objects.filter(user=request.user))),
+            request, *args, **kwargs
+        )
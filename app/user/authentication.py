@@ -0,0 +1,169 @@
+"""
+Token authentication backed by a cached token lookup
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+TOKEN_KEY = 'auth:token:{key}'
+
+_local_caches = {}
+
+
+class LocalTTLCache:
+    """Thread safe LRU mapping whose entries expire after ``ttl``"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def get_local_cache():
+    """Return the in-process token cache, or None when it is disabled"""
+    if settings.AUTH_TOKEN_SHARED_CACHE or not settings.AUTH_TOKEN_CACHE_TTL:
+        return None
+    key = (settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL)
+    if key not in _local_caches:
+        _local_caches[key] = LocalTTLCache(*key)
+    return _local_caches[key]
+
+
+def get_shared_cache():
+    """Return the shared token cache, if one is configured"""
+    alias = settings.AUTH_TOKEN_SHARED_CACHE
+    return caches[alias] if alias else None
+
+
+def token_user(key, user_id):
+    """
+    Return the token and a user carrying only its id.
+
+    Every other field is deferred and loads from the database on first
+    access, so nothing but the id ever comes from the cache.
+    """
+    user = get_user_model().from_db(
+        DEFAULT_DB_ALIAS, ['id', 'is_active'], [user_id, True])
+    return user, Token(key=key, user=user)
+
+
+def get_cached_user_id(key):
+    """Return the cached user id of an active user's token"""
+    shared = get_shared_cache()
+    if shared is not None:
+        return shared.get(TOKEN_KEY.format(key=key))
+    local = get_local_cache()
+    return local.get(key) if local is not None else None
+
+
+async def aget_token_user(key):
+    """Return the active user of a token for async views, or None"""
+    shared = get_shared_cache()
+    if shared is not None:
+        user_id = await shared.aget(TOKEN_KEY.format(key=key))
+    else:
+        user_id = get_cached_user_id(key)
+    if user_id is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            return None
+        if not token.user.is_active:
+            return None
+        await sync_to_async(cache_token)(token)
+        user_id = token.user_id
+    return token_user(key, user_id)[0]
+
+
+def cache_token(token):
+    """Remember the user id of a token whose user is active"""
+    if not token.user.is_active:
+        return
+    shared = get_shared_cache()
+    if shared is not None:
+        shared.set(TOKEN_KEY.format(key=token.key), token.user_id,
+                   timeout=settings.AUTH_TOKEN_SHARED_TTL)
+        return
+    local = get_local_cache()
+    if local is not None:
+        local.set(token.key, token.user_id)
+
+
+def forget_token(key):
+    """Drop a token from the local and shared caches"""
+    for local in _local_caches.values():
+        local.delete(key)
+    shared = get_shared_cache()
+    if shared is not None:
+        shared.delete(TOKEN_KEY.format(key=key))
+
+
+def invalidate_token(key):
+    """Forget a token now and again once the write commits"""
+    forget_token(key)
+    transaction.on_commit(lambda: forget_token(key))
+
+
+def invalidate_user_tokens(user_id):
+    """Forget every token of a user"""
+    keys = Token.objects.filter(user_id=user_id)\
+        .values_list('key', flat=True)
+    for key in keys:
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token to user id lookup.
+
+    Only the user id of an active user is cached, never the user row.
+    With AUTH_TOKEN_SHARED_CACHE set the entries live in that cache, so
+    deleting a token or saving its user is seen by every process at
+    once. Otherwise an opt-in per-process LRU keeps them for
+    AUTH_TOKEN_CACHE_TTL seconds, and other processes keep accepting a
+    revoked token or deactivated user until the entry expires.
+    """
+
+    def authenticate_credentials(self, key):
+        user_id = get_cached_user_id(key)
+        if user_id is None:
+            user, token = super().authenticate_credentials(key)
+            cache_token(token)
+            return user, token
+        return token_user(key, user_id)
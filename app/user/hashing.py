@@ -0,0 +1,73 @@
+"""
+Password hashing limited to a bounded pool per process
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+_executors = {}
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher whose work factor comes from PASSWORD_HASH_ITERATIONS.
+
+    Hashing runs on the bounded pool, so make_password, check_password
+    and authenticate() all share its limit. Stored hashes with a
+    different count are upgraded on the next login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        return get_executor().run(super().encode, password, salt,
+                                  iterations,
+                                  timeout=settings.PASSWORD_HASH_TIMEOUT)
+
+
+class HashingBusy(Exception):
+    """Every hashing slot is taken, or the hash did not finish in time"""
+
+
+class BoundedExecutor:
+    """Thread pool that rejects work rather than queueing it unbounded"""
+
+    def __init__(self, workers, queue):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='password-hash',
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue)
+
+    def run(self, fn, *args, timeout=None):
+        """Run ``fn`` on the pool and wait for its result"""
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+
+        def task():
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(task)
+        except BaseException:
+            self._slots.release()
+            raise
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            raise HashingBusy()
+
+
+def get_executor():
+    """Return the executor configured by PASSWORD_HASH_WORKERS"""
+    key = (settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE)
+    if key not in _executors:
+        _executors[key] = BoundedExecutor(*key)
+    return _executors[key]
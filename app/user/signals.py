@@ -0,0 +1,22 @@
+"""
+Signal handlers for user apis
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_token, invalidate_user_tokens
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Stop authenticating with a deleted token"""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_saved_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached copies of a user whose password or status may change"""
+    if not created:
+        invalidate_user_tokens(instance.pk)
@@ -0,0 +1,153 @@
+"""
+Tests for the cached token authentication
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import (
+    TOKEN_KEY,
+    LocalTTLCache,
+    get_local_cache,
+)
+
+ME_URL = reverse('user:me')
+
+
+@override_settings(AUTH_TOKEN_SHARED_CACHE='', AUTH_TOKEN_CACHE_TTL=30)
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated"""
+
+    def setUp(self):
+        get_local_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_request_skips_token_query(self):
+        """Test a cached token authenticates without the token query"""
+        self.client.get(ME_URL)
+
+        # Only the view's own load of the user row is left
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is still rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token missing')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token drops it from the cache"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user drops the cached entry"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates(self):
+        """Test changing the password forgets the cached user"""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'password': 'newpass123'})
+
+        self.assertIsNone(get_local_cache().get(self.token.key))
+
+    def test_caches_user_id_only(self):
+        """Test the cache holds the user id, not the user row"""
+        self.client.get(ME_URL)
+
+        self.assertEqual(get_local_cache().get(self.token.key), self.user.id)
+
+    def test_update_keeps_password_changed_elsewhere(self):
+        """Test a cached token never writes back a stale user"""
+        self.client.get(ME_URL)
+        # Another process changes the password while the token is cached
+        other = get_user_model().objects.get(pk=self.user.pk)
+        other.set_password('changedpass123')
+        get_user_model().objects.filter(pk=self.user.pk)\
+            .update(password=other.password)
+
+        res = self.client.patch(ME_URL, {'name': 'Renamed'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Renamed')
+        self.assertTrue(self.user.check_password('changedpass123'))
+
+
+class SharedTokenCacheTests(TestCase):
+    """Test the shared cache replaces the per-process one"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    @override_settings(AUTH_TOKEN_SHARED_CACHE='default',
+                       AUTH_TOKEN_CACHE_TTL=30)
+    def test_shared_cache_skips_local_cache(self):
+        self.client.get(ME_URL)
+
+        self.assertIsNone(get_local_cache())
+        self.assertEqual(
+            caches['default'].get(TOKEN_KEY.format(key=self.token.key)),
+            self.user.id,
+        )
+
+    def test_local_cache_disabled_by_default(self):
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(get_local_cache())
+
+
+class LocalTTLCacheTests(TestCase):
+    """Test the in-process LRU"""
+
+    def test_evicts_least_recently_used(self):
+        cache = LocalTTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+    @patch('user.authentication.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        cache = LocalTTLCache(maxsize=2, ttl=10)
+        mock_monotonic.return_value = 100
+        cache.set('a', 1)
+
+        mock_monotonic.return_value = 111
+
+        self.assertIsNone(cache.get('a'))
@@ -0,0 +1,157 @@
+"""
+Tests for offloaded password hashing
+"""
+import threading
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.contrib.auth.signals import user_login_failed
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.test import APIClient
+
+from user.hashing import BoundedExecutor, HashingBusy
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+
+
+@contextmanager
+def saturated_pool():
+    """Hold every hashing slot with a blocked hash until exit"""
+    slots = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE
+    started = threading.Semaphore(0)
+    release = threading.Event()
+    encode = PBKDF2PasswordHasher.encode
+
+    def slow_encode(hasher, *args):
+        started.release()
+        release.wait(5)
+        return encode(hasher, *args)
+
+    with patch.object(PBKDF2PasswordHasher, 'encode', slow_encode):
+        logins = [threading.Thread(target=make_password,
+                                   args=('testpass123',))
+                  for _ in range(slots)]
+        for login in logins:
+            login.start()
+        for _ in logins:
+            started.acquire(timeout=5)
+        try:
+            yield
+        finally:
+            release.set()
+            for login in logins:
+                login.join()
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class PasswordHashingTests(TestCase):
+    """Test logins hash on the bounded pool"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {'email': 'test@example.com',
+                        'password': 'testpass123'}
+        self.user = get_user_model().objects.create_user(**self.payload)
+
+    def test_hash_uses_configured_iterations(self):
+        """Test new hashes use PASSWORD_HASH_ITERATIONS"""
+        self.assertTrue(
+            self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_login_rehashes_outdated_password(self):
+        """Test a login upgrades a hash made with other settings"""
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(
+            self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_inactive_user_rejected(self):
+        """Test an inactive user cannot log in"""
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_failed_login_sends_signal(self):
+        """Test logins still go through authenticate()"""
+        failures = []
+
+        def receiver(sender, **kwargs):
+            failures.append(kwargs['credentials']['email'])
+
+        user_login_failed.connect(receiver)
+        try:
+            res = self.client.post(TOKEN_URL, {**self.payload,
+                                               'password': 'wrongpass'})
+        finally:
+            user_login_failed.disconnect(receiver)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(failures, [self.payload['email']])
+
+    def test_saturated_pool_returns_503(self):
+        """Test the default slots reject logins before threads run out"""
+        slots = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE
+        self.assertLess(slots, settings.UWSGI_THREADS)
+
+        with saturated_pool():
+            res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_saturated_pool_on_signup_returns_503(self):
+        """Test creating a user maps a saturated pool to 503"""
+        payload = {'email': 'new@example.com', 'password': 'testpass123',
+                   'name': 'New'}
+
+        with saturated_pool():
+            res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_saturated_pool_outside_api_raises_plain_error(self):
+        """Test non-API callers such as management commands get HashingBusy"""
+        with saturated_pool():
+            with self.assertRaises(HashingBusy) as error:
+                make_password('testpass123')
+
+        self.assertNotIsInstance(error.exception, APIException)
+
+
+class BoundedExecutorTests(TestCase):
+
+    def test_rejects_work_beyond_capacity(self):
+        """Test a full executor raises instead of queueing"""
+        executor = BoundedExecutor(workers=1, queue=0)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=executor.run, args=(block,))
+        worker.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(HashingBusy):
+                executor.run(abs, -1)
+        finally:
+            release.set()
+            worker.join()
+
+        self.assertEqual(executor.run(abs, -1), 1)
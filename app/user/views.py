@@ -2,30 +2,52 @@
 Views for api
 """
 
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import APIException
 from rest_framework.settings import api_settings
 
+from core.instrumentation import InstrumentedViewMixin
+from user.authentication import CachedTokenAuthentication
+from user.hashing import HashingBusy
 from user.serializers import UserSerializer, TokenSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class HashingUnavailable(APIException):
+    """Every hashing slot is taken"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, try again shortly.'
+    default_code = 'hashing_unavailable'
+
+
+class HashingBusyMixin:
+    """Answer 503 when the password hashing pool is saturated"""
+
+    def handle_exception(self, exc):
+        if isinstance(exc, HashingBusy):
+            exc = HashingUnavailable()
+        return super().handle_exception(exc)
+
+
+class CreateUserView(HashingBusyMixin, generics.CreateAPIView):
     """Create user in view"""
     serializer_class = UserSerializer
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(HashingBusyMixin, ObtainAuthToken):
     """Create new toke"""
     serializer_class = TokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(InstrumentedViewMixin, HashingBusyMixin,
+                     generics.RetrieveUpdateAPIView):
     """Manage the authenticated"""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        """Get"""
-        return self.request.user
+        """Load the current row, request.user may be a cached id only"""
+        return get_user_model().objects.get(pk=self.request.user.pk)
@@ -0,0 +1,16 @@
+server {
+    listen ${LISTEN_PORT};
+
+    location /static {
+        alias /vol/static;
+    }
+
+    location / {
+           proxy_pass            http://${APP_HOST}:${APP_PORT};
+           proxy_set_header      Host $host;
+           proxy_set_header      X-Forwarded-For $proxy_add_x_forwarded_for;
+           proxy_http_version    1.1;
+           proxy_set_header      Connection "";
+           client_max_body_size 10M;
+    }
+}
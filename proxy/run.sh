@@ -2,5 +2,11 @@
 
 set -e
 
-envsubst < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
+TEMPLATE=/etc/nginx/default.conf.tpl
+if [ "$SERVER_MODE" = "asgi" ]; then
+    TEMPLATE=/etc/nginx/default.asgi.conf.tpl
+fi
+
+envsubst '${LISTEN_PORT} ${APP_HOST} ${APP_PORT}' \
+    < "$TEMPLATE" > /etc/nginx/conf.d/default.conf
 nginx -g 'daemon off;'
\ No newline at end of file
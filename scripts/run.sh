@@ -5,6 +5,18 @@ set -e
 
 python manage.py wait_for_db
 python manage.py collectstatic --noinput
+python manage.py build_schema
 python manage.py migrate
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --moudle app.wsgi
+WORKERS=${WORKERS:-4}
+# Read by the settings too, which size the password hashing pool from it
+export UWSGI_THREADS=${UWSGI_THREADS:-4}
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    uvicorn app.asgi:application --host 0.0.0.0 --port 9000 \
+        --workers "$WORKERS" --no-access-log
+else
+    uwsgi --socket :9000 --workers "$WORKERS" \
+        --threads "$UWSGI_THREADS" --master --enable-threads \
+        --module app.wsgi
+fi